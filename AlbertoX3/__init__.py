@@ -7,6 +7,7 @@ __url__ = "https://github.com/Alberto-X3/Alberto-X3-V3"
 
 from .aio import *
 from .bot_api import *
+from .cache import *
 from .colors import *
 from .constants import *
 from .contributors import *
@@ -14,9 +15,15 @@ from .database import *
 from .enum import *
 from .environment import *
 from .errors import *
+from .memory_redis import *
+from .metrics import *
+from .migrations import *
 from .misc import *
 from .naff_wrapper import *
 from .permission import *
+from .routing import *
 from .settings import *
+from .statements import *
 from .translations import *
 from .utils import *
+from .write_behind import *
@@ -1,6 +1,7 @@
 from AlbertoX3 import *
 from AlbertUnruhUtils.utils.logger import get_logger
 from naff import Client, Intents
+from time import perf_counter
 
 
 logger = get_logger(None, level=LOG_LEVEL)
@@ -43,8 +44,20 @@ for ext in Config.EXTENSIONS:
 
 
 async def a_main():
-    await db.create_tables()
-    await bot.astart(TOKEN)
+    await db.migrate(Config.EXTENSIONS)
+    async with db_context():
+        await seed_defaults()
+        start = perf_counter()
+        keys = await warm_up_caches()
+    logger.info(f"Warmed up the caches with {keys} keys in {perf_counter() - start:.2f}s")
+    invalidation_bus.start()
+    try:
+        await bot.astart(TOKEN)
+    finally:
+        await DelayedJobs.stop_all()
+        await invalidation_bus.stop()
+        await redis_breaker.close()
+        await db.shutdown()
 
 
 event_loop.run_until_complete(a_main())
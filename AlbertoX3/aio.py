@@ -2,27 +2,61 @@ __all__ = (
     "event_loop",
     "Thread",
     "LockDeco",
+    "KeyedLock",
+    "SingleFlight",
+    "DataLoader",
+    "CircuitBreaker",
     "gather_any",
     "run_in_thread",
     "semaphore_gather",
     "run_as_task",
+    "DelayedJobs",
 )
 
+import orjson
 from asyncio.events import AbstractEventLoop, get_event_loop, get_running_loop
+from asyncio.exceptions import CancelledError, TimeoutError
+from asyncio.futures import Future
 from asyncio.locks import Event, Lock, Semaphore
-from asyncio.tasks import create_task, gather
+from asyncio.tasks import Task, create_task, gather, shield, sleep, wait_for
+from contextlib import asynccontextmanager
+from contextvars import Context
+from datetime import datetime
 from functools import partial, update_wrapper, wraps
 from threading import Thread as t_Thread
-from typing import Awaitable, Callable, Literal, NoReturn, ParamSpec, TypeVar
+from time import perf_counter, time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    ClassVar,
+    Generic,
+    Hashable,
+    Iterable,
+    Literal,
+    NoReturn,
+    Optional,
+    ParamSpec,
+    Sequence,
+    TypeVar,
+)
+from uuid import uuid4
 from .constants import MISSING
-from .errors import GatherAnyError
+from .errors import CircuitOpenError, GatherAnyError
+from ._utils_essentials import get_logger
 
 
 T = TypeVar("T")
 P = ParamSpec("P")
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
 
 _THREAD_RETURN = tuple[Literal[True], T] | tuple[Literal[False], Exception]
 _FUNC = Callable[P, T]
+_HANDLER = Callable[[dict[str, Any]], Awaitable[Any]]
+
+logger = get_logger(__name__)
 
 
 event_loop: AbstractEventLoop = get_event_loop()
@@ -74,6 +108,330 @@ class LockDeco:
             return await self.func(*args, **kwargs)
 
 
+class KeyedLock:
+    """
+    One lock per key, different keys don't block each other.
+
+    Examples
+    --------
+    >>> locks = KeyedLock()
+    >>> async with locks("key"):
+    ...     ...
+    """
+
+    _locks: dict[Hashable, Lock]
+    _users: dict[Hashable, int]
+
+    def __init__(self):
+        self._locks = {}
+        self._users = {}
+
+    def locked(self, key: Hashable) -> bool:
+        return key in self._locks and self._locks[key].locked()
+
+    @asynccontextmanager
+    async def __call__(self, key: Hashable) -> AsyncIterator[None]:
+        if (lock := self._locks.get(key)) is None:
+            lock = self._locks[key] = Lock()
+        self._users[key] = self._users.get(key, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            # locks are only kept while someone holds or waits for them
+            if (users := self._users.pop(key) - 1) > 0:
+                self._users[key] = users
+            else:
+                del self._locks[key]
+
+
+class SingleFlight:
+    """
+    Shares one in-flight call per key, concurrent callers with the same key get its result (or exception).
+
+    Notes
+    -----
+    The first caller runs the function in its own context (e.g. its database session).
+    If it gets cancelled, one of the waiting callers runs the function again.
+    """
+
+    _calls: dict[Hashable, Future]
+
+    def __init__(self):
+        self._calls = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, func: Callable[P, Awaitable[T]], *args: P.args, **kwargs: P.kwargs) -> T:
+        """
+        Parameters
+        ----------
+        key: Hashable
+            Calls with the same key are shared.
+        func: Callable[P, Awaitable[T]]
+            The coroutine function to call if no call for ``key`` is in flight.
+        args: P.args
+            The arguments for the function.
+        kwargs: P.kwargs
+            The keyword-arguments for the function.
+
+        Returns
+        -------
+        T
+            The return from the (shared) call.
+        """
+        while (future := self._calls.get(key)) is not None:
+            try:
+                return await shield(future)
+            except CancelledError:
+                if not future.cancelled():
+                    raise  # the waiting caller itself got cancelled
+
+        future = self._calls[key] = get_running_loop().create_future()
+        try:
+            result = await func(*args, **kwargs)
+        except CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # the waiting callers (if any) raise it, don't log it as unretrieved
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+
+class DataLoader(Generic[K, V]):
+    """
+    Collects the keys requested within one iteration of the event loop and loads them with one call.
+
+    Notes
+    -----
+    Keys are deduplicated, a batch holds at most ``max_batch_size`` keys. The batch function runs in
+    a task with an empty context, so it e.g. has to open a database session of its own.
+
+    Examples
+    --------
+    >>> async def load_levels(permissions: list[str]) -> list[int]:
+    ...     ...  # one query for all permissions
+    >>> levels = DataLoader(load_levels)
+    >>> await gather(levels.load("a"), levels.load("b"), levels.load("a"))  # load_levels(["a", "b"])
+    """
+
+    batch_fn: Callable[[list[K]], Awaitable[Sequence[V]]]
+    max_batch_size: int
+    batches: int
+    _pending: dict[K, Future]
+    _scheduled: bool
+    _tasks: set[Task]
+
+    def __init__(self, batch_fn: Callable[[list[K]], Awaitable[Sequence[V]]], max_batch_size: int = 100):
+        """
+        Parameters
+        ----------
+        batch_fn: Callable[[list[K]], Awaitable[Sequence[V]]]
+            Loads the values of the keys, in the same order.
+        max_batch_size: int
+            The maximum amount of keys per call, a full batch gets dispatched right away.
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self._pending = {}
+        self._scheduled = False
+        self._tasks = set()
+
+    async def load(self, key: K) -> V:
+        if (future := self._pending.get(key)) is None:
+            future = self._pending[key] = get_running_loop().create_future()
+            if len(self._pending) >= self.max_batch_size:
+                self._dispatch()
+            elif not self._scheduled:
+                self._scheduled = True
+                get_running_loop().call_soon(self._dispatch)
+        # a cancelled caller mustn't cancel the batch of the others
+        return await shield(future)
+
+    async def load_many(self, keys: Iterable[K]) -> list[V]:
+        return list(await gather(*map(self.load, keys)))
+
+    def _dispatch(self) -> NoReturn:
+        self._scheduled = False
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        task = Context().run(create_task, self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: dict[K, Future]) -> NoReturn:
+        self.batches += 1
+        try:
+            values = await self.batch_fn(list(batch))
+            if len(values) != len(batch):
+                raise ValueError(f"The batch function returned {len(values)} values for {len(batch)} keys")
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()  # every caller may have been cancelled, don't log it as unretrieved
+        else:
+            for future, value in zip(batch.values(), values):
+                if not future.done():
+                    future.set_result(value)
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing (or slow) dependency and probes it in the background until it's back.
+
+    Notes
+    -----
+    Calls which fail, time out or take longer than ``slow_call`` count as failures,
+    ``threshold`` failures in a row open the circuit. While it's open, ``call`` raises
+    ``CircuitOpenError`` right away, so callers can fall back without waiting.
+    """
+
+    name: str
+    threshold: int
+    timeout: float
+    slow_call: float
+    recovery_interval: float
+    failures: int
+    trips: int
+    _probe: Callable[[], Awaitable[Any]]
+    _on_recovery: list[Callable[[], Awaitable[Any]]]
+    _task: Optional[Task]
+
+    def __init__(
+        self,
+        name: str,
+        probe: Callable[[], Awaitable[Any]],
+        threshold: int = 5,
+        timeout: float = 0.5,
+        slow_call: float = 0.1,
+        recovery_interval: float = 5,
+    ):
+        """
+        Parameters
+        ----------
+        name: str
+            The name of the dependency, used for logging.
+        probe: Callable[[], Awaitable[Any]]
+            A cheap call (e.g. a ping) which succeeds once the dependency is back.
+        threshold: int
+            The amount of failures in a row which open the circuit.
+        timeout: float
+            The amount of seconds after which a call is cancelled and counts as failure.
+        slow_call: float
+            Calls taking longer (in seconds) count as failures, but still return their result.
+        recovery_interval: float
+            The amount of seconds between two probes while the circuit is open.
+        """
+        self.name = name
+        self.threshold = threshold
+        self.timeout = timeout
+        self.slow_call = slow_call
+        self.recovery_interval = recovery_interval
+        self.failures = 0
+        self.trips = 0
+        self._probe = probe
+        self._on_recovery = []
+        self._task = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._task is not None
+
+    def on_recovery(self, callback: Callable[[], Awaitable[Any]]) -> NoReturn:
+        """
+        Registers a coroutine function which gets called after the circuit closed again.
+        """
+        self._on_recovery.append(callback)
+
+    async def call(self, func: Callable[P, Awaitable[T]], *args: P.args, **kwargs: P.kwargs) -> T:
+        """
+        Raises
+        ------
+        CircuitOpenError
+            If the circuit is open.
+        Exception
+            Any exception (including ``TimeoutError``) raised by the call, it has been counted as failure.
+        """
+        if self.is_open:
+            raise CircuitOpenError(self.name)
+
+        start = perf_counter()
+        try:
+            result = await wait_for(func(*args, **kwargs), self.timeout)
+        except CancelledError:
+            raise
+        except Exception:
+            self._failure()
+            raise
+
+        if perf_counter() - start > self.slow_call:
+            self._failure()
+        else:
+            self.failures = 0
+        return result
+
+    def trip(self) -> NoReturn:
+        """
+        Opens the circuit until a probe succeeds.
+        """
+        if self.is_open:
+            return
+        self.trips += 1
+        logger.warning(f"{self.name} is failing, circuit opened")
+        self._task = create_task(self._recover())
+
+    async def close(self) -> NoReturn:
+        """
+        Stops probing (e.g. on shutdown).
+        """
+        if (task := self._task) is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except CancelledError:
+            pass
+        self._task = None
+
+    def _failure(self) -> NoReturn:
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.trip()
+
+    async def _recover(self) -> NoReturn:
+        while True:
+            await sleep(self.recovery_interval)
+            try:
+                await wait_for(self._probe(), self.timeout)
+            except CancelledError:
+                raise
+            except Exception:  # noqa
+                continue
+            break
+
+        self.failures = 0
+        self._task = None
+        logger.info(f"{self.name} is back, circuit closed")
+        for callback in self._on_recovery:
+            try:
+                await callback()
+            except Exception:  # noqa
+                logger.exception(f"Recovery callback of {self.name} failed")
+
+
 async def gather_any(*coroutines: Awaitable[T]) -> tuple[int, T]:
     """
     Parameters
@@ -188,3 +546,328 @@ def run_as_task(func: _FUNC) -> _FUNC:
         create_task(func(*args, **kwargs))
 
     return inner
+
+
+class DelayedJobs:
+    """
+    A persistent scheduler for jobs which have to run at a certain time (e.g. lifting a sanction).
+
+    Notes
+    -----
+    Jobs are stored in redis, a sorted set ``jobs:<name>`` holds the job ids scored by their due time
+    and the hash ``jobs:<name>:data`` their kind and payload. Therefore pending jobs survive restarts.
+    A single loop dispatches all due jobs, it sleeps until the next one is due (but at most ``poll_interval``
+    to notice jobs scheduled by other processes).
+
+    Due jobs are claimed in a transaction (``WATCH``/``MULTI``) which moves their score to the end of a lease,
+    therefore a job runs only once even with multiple processes, and a job which has been scheduled again
+    meanwhile isn't claimed before it's due. If the process dies while running it, the job becomes due again
+    once the lease (``visibility_timeout``) expired.
+    Failed jobs are retried after ``retry_delay``, after ``max_attempts`` failures they're moved to the
+    hash ``jobs:<name>:dead``.
+    """
+
+    started: ClassVar[set["DelayedJobs"]] = set()
+
+    name: str
+    poll_interval: float
+    retry_delay: float
+    visibility_timeout: float
+    max_attempts: int
+    batch_size: int
+    _redis: Any
+    _handlers: dict[str, _HANDLER]
+    _semaphore: Semaphore
+    _wakeup: Event
+    _task: Optional[Task]
+    _running: set[Task]
+
+    def __init__(
+        self,
+        name: str,
+        redis: Any,
+        poll_interval: float = 5.0,
+        retry_delay: float = 60.0,
+        visibility_timeout: float = 300.0,
+        max_attempts: int = 5,
+        batch_size: int = 100,
+        concurrency: int = 10,
+    ):
+        """
+        Parameters
+        ----------
+        name: str
+            The name of the scheduler, used for the redis keys.
+        redis: Redis
+            The redis client to store the jobs.
+        poll_interval: float
+            The maximum amount of seconds to sleep between two checks for due jobs.
+        retry_delay: float
+            The amount of seconds to wait before a failed job gets retried.
+        visibility_timeout: float
+            The amount of seconds a claimed job is reserved for its process, jobs running longer may run twice.
+        max_attempts: int
+            The amount of failures after which a job is given up.
+        batch_size: int
+            The maximum amount of due jobs to claim at once.
+        concurrency: int
+            The maximum amount of jobs to run simultaneously.
+        """
+        self.name = name
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size
+        self._redis = redis
+        self._handlers = {}
+        self._semaphore = Semaphore(concurrency)
+        self._wakeup = Event()
+        self._task = None
+        self._running = set()
+
+    @property
+    def _key(self) -> str:
+        return f"jobs:{self.name}"
+
+    @property
+    def _data_key(self) -> str:
+        return f"jobs:{self.name}:data"
+
+    @property
+    def _dead_key(self) -> str:
+        return f"jobs:{self.name}:dead"
+
+    def handler(self, kind: str) -> Callable[[_HANDLER], _HANDLER]:
+        """
+        Registers the handler for a kind of jobs, it gets called with the payload of the job.
+        """
+
+        def decorator(func: _HANDLER) -> _HANDLER:
+            self._handlers[kind] = func
+            return func
+
+        return decorator
+
+    async def schedule(
+        self, kind: str, payload: dict[str, Any], at: datetime | float, job_id: Optional[str] = None
+    ) -> str:
+        """
+        Parameters
+        ----------
+        kind: str
+            The kind of the job, selects the handler.
+        payload: dict[str, Any]
+            The JSON-serializable arguments for the handler.
+        at: datetime, float
+            When the job is due, as (timezone-aware) datetime or timestamp.
+        job_id: str, optional
+            The id of the job, scheduling an existing id replaces that job.
+
+        Returns
+        -------
+        str
+            The id of the job.
+        """
+        job_id = job_id or uuid4().hex
+        due = at.timestamp() if isinstance(at, datetime) else at
+
+        async with self._redis.pipeline() as pipe:
+            pipe.hset(self._data_key, job_id, orjson.dumps({"kind": kind, "payload": payload}))
+            pipe.zadd(self._key, {job_id: due})
+            await pipe.execute()
+
+        self._wakeup.set()
+        return job_id
+
+    async def cancel(self, job_id: str) -> bool:
+        """
+        Returns
+        -------
+        bool
+            Whether the job was pending or not.
+        """
+        async with self._redis.pipeline() as pipe:
+            pipe.zrem(self._key, job_id)
+            pipe.hdel(self._data_key, job_id)
+            removed, _ = await pipe.execute()
+        return bool(removed)
+
+    async def pending(self) -> int:
+        return await self._redis.zcard(self._key)
+
+    async def dead(self) -> dict[str, dict[str, Any]]:
+        """
+        Returns
+        -------
+        dict[str, dict[str, Any]]
+            The jobs which were given up by their id, with the ``error`` of their last attempt.
+        """
+        return {
+            job_id.decode(): orjson.loads(raw) for job_id, raw in (await self._redis.hgetall(self._dead_key)).items()
+        }
+
+    async def start(self) -> NoReturn:
+        """
+        Starts dispatching jobs, any amount of processes may dispatch the jobs of the same name.
+        """
+        if self._task is not None:
+            return
+
+        self._task = create_task(self._run())
+        self._task.add_done_callback(self._on_done)
+        DelayedJobs.started.add(self)
+
+    def _on_done(self, task: Task) -> NoReturn:
+        if not task.cancelled() and (e := task.exception()) is not None:
+            logger.critical(f"The dispatcher of {self.name!r} died, no more jobs will run", exc_info=e)
+
+    async def stop(self) -> NoReturn:
+        """
+        Stops dispatching jobs and waits for the running ones.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except CancelledError:
+            pass
+        self._task = None
+        DelayedJobs.started.discard(self)
+        await gather(*self._running, return_exceptions=True)  # unfinished jobs get due again once the lease expired
+
+    @classmethod
+    async def stop_all(cls) -> NoReturn:
+        """
+        Stops all started schedulers, e.g. before the database shuts down.
+        """
+        await gather(*(jobs.stop() for jobs in list(cls.started)))
+
+    async def _run(self) -> NoReturn:
+        while True:
+            self._wakeup.clear()
+            try:
+                delay = await self._dispatch()
+            except Exception:  # noqa
+                logger.exception(f"Dispatching the jobs of {self.name!r} failed, retrying in {self.poll_interval}s")
+                delay = self.poll_interval
+            if delay <= 0:
+                continue
+            try:
+                await wait_for(self._wakeup.wait(), delay)
+            except TimeoutError:
+                pass
+
+    async def _dispatch(self) -> float:
+        """
+        Claims and starts the due jobs.
+
+        Returns
+        -------
+        float
+            The amount of seconds to wait until the next job is due.
+        """
+        lease, claimed = await self._claim()
+        for job_id, raw in claimed.items():
+            self._running.add(task := create_task(self._execute(job_id, lease, raw)))
+            task.add_done_callback(self._running.discard)
+        if len(claimed) == self.batch_size:
+            return 0
+
+        upcoming = await self._redis.zrangebyscore(self._key, "-inf", "+inf", start=0, num=1, withscores=True)
+        if not upcoming:
+            return self.poll_interval
+        return min(self.poll_interval, max(0.0, upcoming[0][1] - time()))
+
+    async def _claim(self) -> tuple[float, dict[str, bytes]]:
+        """
+        Returns
+        -------
+        tuple[float, dict[str, bytes]]
+            The end of the lease and the claimed jobs with their data.
+        """
+
+        async def claim(pipe: Any) -> tuple[float, dict[str, bytes]]:
+            lease = (now := time()) + self.visibility_timeout
+            if not (due := await pipe.zrangebyscore(self._key, "-inf", now, start=0, num=self.batch_size)):
+                return lease, {}
+            jobs = dict(zip(due, await pipe.hmget(self._data_key, due)))
+            pipe.multi()
+            if orphans := [job_id for job_id, raw in jobs.items() if raw is None]:
+                pipe.zrem(self._key, *orphans)
+            if claimed := {job_id: raw for job_id, raw in jobs.items() if raw is not None}:
+                pipe.zadd(self._key, dict.fromkeys(claimed, lease))
+            return lease, {job_id.decode(): raw for job_id, raw in claimed.items()}
+
+        # fails if a job got scheduled again or cancelled before the leases are set, the due jobs are read again then
+        return await self._redis.transaction(claim, self._key, self._data_key, value_from_callable=True)
+
+    async def _execute(self, job_id: str, lease: float, raw: bytes) -> NoReturn:
+        async with self._semaphore:
+            await self._attempt(job_id, lease, raw)
+
+    async def _attempt(self, job_id: str, lease: float, raw: bytes) -> NoReturn:
+        job = orjson.loads(raw)
+
+        try:
+            if (handler := self._handlers.get(job["kind"])) is None:
+                raise LookupError(f"No handler for {job['kind']!r}")
+            await handler(job["payload"])
+        except Exception as e:  # noqa
+            job["attempts"] = attempts = job.get("attempts", 0) + 1
+            if attempts < self.max_attempts:
+                queue = partial(self._retry, job_id, job)
+                message = (
+                    f"Job {job_id!r} of {self.name!r} failed ({attempts}/{self.max_attempts}), "
+                    f"retrying in {self.retry_delay}s"
+                )
+            else:
+                queue = partial(self._bury, job_id, job | {"error": repr(e)})
+                message = f"Job {job_id!r} of {self.name!r} failed {attempts} times, giving up"
+
+            if not await self._finish(job_id, lease, queue):
+                message = f"Job {job_id!r} of {self.name!r} failed, it has been scheduled again already"
+            logger.exception(message)
+            return
+
+        await self._finish(job_id, lease, partial(self._remove, job_id))
+
+    async def _finish(self, job_id: str, lease: float, queue: Callable[[Any], Any]) -> bool:
+        """
+        Queues the commands to finish an attempt if the job still holds the lease.
+
+        Parameters
+        ----------
+        job_id: str
+        lease: float
+        queue: Callable[[Any], Any]
+            Queues the commands on the pipeline.
+
+        Returns
+        -------
+        bool
+            Whether the job still held the lease, ``False`` if it has been scheduled again or cancelled.
+        """
+
+        async def finish(pipe: Any) -> bool:
+            if await pipe.zscore(self._key, job_id) != lease:
+                return False
+            pipe.multi()
+            queue(pipe)
+            return True
+
+        # fails if the job got scheduled again or cancelled meanwhile, the lease is checked again then
+        return await self._redis.transaction(finish, self._key, self._data_key, value_from_callable=True)
+
+    def _retry(self, job_id: str, job: dict[str, Any], pipe: Any) -> NoReturn:
+        pipe.hset(self._data_key, job_id, orjson.dumps(job))
+        pipe.zadd(self._key, {job_id: time() + self.retry_delay})
+
+    def _bury(self, job_id: str, job: dict[str, Any], pipe: Any) -> NoReturn:
+        pipe.hset(self._dead_key, job_id, orjson.dumps(job))
+        self._remove(job_id, pipe)
+
+    def _remove(self, job_id: str, pipe: Any) -> NoReturn:
+        pipe.zrem(self._key, job_id)
+        pipe.hdel(self._data_key, job_id)
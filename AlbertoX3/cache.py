@@ -0,0 +1,816 @@
+__all__ = (
+    "LRUCache",
+    "EntityCache",
+    "InvalidationBus",
+    "CachePolicy",
+    "CacheStats",
+    "CacheNamespace",
+)
+
+
+import orjson
+import re
+from aioredis.client import Redis
+from asyncio.exceptions import CancelledError
+from asyncio.tasks import Task, create_task, shield, sleep
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import chain
+from math import log
+from random import random, uniform
+from sqlalchemy.event import listens_for
+from sqlalchemy.orm.decl_api import DeclarativeMeta
+from sqlalchemy.orm.session import Session, make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.sql.schema import Table
+from time import monotonic, perf_counter
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    ClassVar,
+    Generic,
+    Hashable,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    NoReturn,
+    Optional,
+    TYPE_CHECKING,
+    TypeVar,
+)
+from uuid import uuid4
+from .aio import CircuitBreaker, DataLoader, SingleFlight
+from .environment import (
+    CACHE_LOCAL_SIZE,
+    CACHE_LOCAL_TTL,
+    CACHE_NEGATIVE_TTL,
+    CACHE_POLICIES,
+    CACHE_REFRESH_BETA,
+    CACHE_TTL,
+    CACHE_TTL_JITTER,
+)
+from .errors import CircuitOpenError
+from .metrics import Histogram
+from ._utils_essentials import get_logger
+
+if TYPE_CHECKING:
+    # only needed for type hinting
+    from .database import Base
+
+
+T = TypeVar("T")
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+logger = get_logger(__name__)
+
+
+class LRUCache(Generic[K, V]):
+    """
+    A size-bounded cache with least-recently-used eviction and a time-to-live per entry.
+    """
+
+    maxsize: int
+    ttl: float
+    hits: int
+    misses: int
+    evictions: int
+    _data: OrderedDict[K, tuple[float, V]]
+
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        Parameters
+        ----------
+        maxsize: int
+            The maximum amount of entries, ``0`` disables the cache.
+        ttl: float
+            The amount of seconds an entry stays valid.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+
+    def get(self, key: K, default: Any = None) -> V | Any:
+        if (entry := self._data.get(key)) is None:
+            self.misses += 1
+            return default
+
+        expires, value = entry
+        if expires <= monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> NoReturn:  # noqa A003
+        if self.maxsize <= 0:
+            return
+
+        self._data[key] = (monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: K) -> NoReturn:
+        self._data.pop(key, None)
+
+    def pop_if(self, predicate: Callable[[K], bool]) -> int:
+        """
+        Removes every entry whose key matches the predicate.
+
+        Returns
+        -------
+        int
+            The amount of removed entries.
+        """
+        keys = [k for k in self._data if predicate(k)]
+        for k in keys:
+            del self._data[k]
+        return len(keys)
+
+    def clear(self) -> NoReturn:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._data
+
+
+class EntityCache:
+    """
+    Caches the column values of ORM-rows by their model and primary key.
+    """
+
+    generation: int
+    _cache: LRUCache[tuple, dict[str, Any]]
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        """
+        Parameters
+        ----------
+        maxsize: int
+            The maximum amount of cached rows, ``0`` disables the cache.
+        ttl: float
+            The amount of seconds a row stays cached.
+        """
+        self.generation = 0
+        self._cache = LRUCache(maxsize, ttl)
+
+    @property
+    def hits(self) -> int:
+        return self._cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self._cache.misses
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _primary_keys(cls: type["Base"]) -> tuple[str, ...]:
+        mapper = cls.__mapper__  # type: ignore
+        return tuple(mapper.get_property_by_column(c).key for c in mapper.primary_key)
+
+    def key(self, cls: Any, kwargs: dict[str, Any]) -> Optional[tuple]:
+        """
+        Returns the identity key if ``kwargs`` exactly select a primary key of ``cls``, otherwise ``None``.
+        """
+        if self._cache.maxsize <= 0 or not isinstance(cls, DeclarativeMeta):
+            return None
+        if len(keys := self._primary_keys(cls)) != len(kwargs) or any(kwargs.get(k) is None for k in keys):
+            return None
+        return identity_key(cls, tuple(kwargs[k] for k in keys))
+
+    def get(self, key: tuple) -> Optional["Base"]:
+        """
+        Returns a detached copy of the cached row.
+        """
+        if (values := self._cache.get(key)) is None:
+            return None
+        obj = key[0](**values)
+        make_transient_to_detached(obj)
+        return obj
+
+    def set(self, key: tuple, obj: "Base", generation: int) -> NoReturn:  # noqa A003
+        """
+        Caches a row unless something got invalidated since ``generation`` has been read.
+        """
+        if generation != self.generation:
+            return
+        mapper = obj.__mapper__  # type: ignore
+        self._cache.set(key, {attr.key: getattr(obj, attr.key) for attr in mapper.column_attrs})
+
+    def invalidate(self, obj: "Base") -> NoReturn:
+        mapper = obj.__mapper__  # type: ignore
+        self.invalidate_key(mapper.identity_key_from_instance(obj))
+
+    def invalidate_key(self, key: tuple) -> NoReturn:
+        self.generation += 1
+        self._cache.pop(key)
+
+    def invalidate_table(self, table: Table) -> NoReturn:
+        self.generation += 1
+        self._cache.pop_if(lambda k: k[0].__table__ == table)  # DML statements reference annotated tables
+
+    def clear(self) -> NoReturn:
+        self.generation += 1
+        self._cache.clear()
+
+
+@listens_for(Session, "after_flush")
+def _remember_flush(session: Session, flush_context: Any) -> NoReturn:
+    # autoflush empties .new/.dirty/.deleted, but the changes still have to be committed
+    session.info["flushed"] = True
+
+    if (cache := session.info.get("entity_cache")) is None:
+        return
+    keys: set[tuple] = session.info.setdefault("entity_keys", set())
+    tables: set[str] = session.info.setdefault("changed_tables", set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        keys.add(key := obj.__mapper__.identity_key_from_instance(obj))
+        tables.add(obj.__table__.name)
+        cache.invalidate_key(key)
+
+
+@listens_for(Session, "after_commit")
+@listens_for(Session, "after_soft_rollback")
+def _invalidate_flushed(session: Session, *_: Any) -> NoReturn:
+    # rows may have been cached again between the flush and the end of the transaction
+    if (cache := session.info.get("entity_cache")) is None:
+        return
+    for key in session.info.pop("entity_keys", ()):
+        cache.invalidate_key(key)
+
+
+class InvalidationBus:
+    """
+    Tells all processes sharing a redis server which keys of their local caches are outdated.
+
+    Notes
+    -----
+    Invalidations are published on one pub/sub channel as ``{"origin", "namespace", "keys"}``,
+    ``keys`` being ``None`` clears the whole namespace. Processes ignore their own messages.
+    Messages published while a process isn't subscribed are lost, therefore it clears all local
+    caches whenever it (re)subscribes.
+    """
+
+    channel: str
+    origin: str
+    retry_delay: float
+    breaker: Optional[CircuitBreaker]
+    _redis: Redis
+    _handlers: dict[str, Callable[[Optional[list[str]]], Any]]
+    _task: Optional[Task]
+
+    def __init__(
+        self,
+        redis_: Redis,
+        channel: str = "cache:invalidate",
+        retry_delay: float = 5,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Parameters
+        ----------
+        redis_: Redis
+            The redis client.
+        channel: str
+            The pub/sub channel.
+        retry_delay: float
+            The amount of seconds to wait before subscribing again after the connection broke.
+        breaker: CircuitBreaker, optional
+            Skips publishing while redis is unavailable.
+        """
+        self.channel = channel
+        self.origin = uuid4().hex
+        self.retry_delay = retry_delay
+        self.breaker = breaker
+        self._redis = redis_
+        self._handlers = {}
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def subscribe(self, namespace: str, handler: Callable[[Optional[list[str]]], Any]) -> NoReturn:
+        """
+        Registers the function which evicts the keys (all keys on ``None``) of ``namespace`` in this process.
+        """
+        self._handlers[namespace] = handler
+
+    async def publish(self, namespace: str, keys: Optional[Iterable[str]] = None) -> NoReturn:
+        """
+        Invalidates ``keys`` (or the whole ``namespace``) in all other processes.
+        """
+        keys = None if keys is None else list(keys)
+        if keys == []:
+            return
+        message = orjson.dumps({"origin": self.origin, "namespace": namespace, "keys": keys})
+        try:
+            if self.breaker is None:
+                await self._redis.publish(self.channel, message)
+            else:
+                await self.breaker.call(self._redis.publish, self.channel, message)
+        except CircuitOpenError:
+            pass
+        except Exception:  # noqa
+            # the other processes still drop the value once their local ttl is over
+            logger.exception(f"Couldn't publish the invalidation of {namespace!r}")
+
+    def start(self) -> NoReturn:
+        if not self.running:
+            self._task = create_task(self._listen())
+
+    async def stop(self) -> NoReturn:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except CancelledError:
+            pass
+        self._task = None
+
+    def _dispatch(self, namespace: str, keys: Optional[list[str]]) -> NoReturn:
+        if (handler := self._handlers.get(namespace)) is None:
+            return
+        try:
+            handler(keys)
+        except Exception:  # noqa
+            logger.exception(f"Couldn't invalidate {namespace!r}")
+
+    def _handle(self, data: bytes) -> NoReturn:
+        try:
+            message = orjson.loads(data)
+        except orjson.JSONDecodeError:
+            logger.warning(f"Ignoring malformed invalidation {data!r}")
+            return
+        if message.get("origin") != self.origin:
+            self._dispatch(message.get("namespace"), message.get("keys"))
+
+    async def _listen(self) -> NoReturn:
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                for namespace in list(self._handlers):
+                    self._dispatch(namespace, None)
+
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._handle(message["data"])
+            except CancelledError:
+                raise
+            except Exception:  # noqa
+                logger.exception(f"Lost the subscription to {self.channel!r}, retrying in {self.retry_delay}s")
+            finally:
+                await shield(pubsub.close())
+            await sleep(self.retry_delay)
+
+
+class CachePolicy(NamedTuple):
+    """
+    How a ``CacheNamespace`` caches, ``CACHE_POLICIES`` overrides the numbers per namespace.
+    """
+
+    ttl: int = CACHE_TTL  # seconds in redis
+    local_size: int = CACHE_LOCAL_SIZE  # values in the process, 0 disables the local cache
+    local_ttl: float = CACHE_LOCAL_TTL  # seconds in the process
+    negative_ttl: int = CACHE_NEGATIVE_TTL  # seconds a missing value stays in redis
+    jitter: float = CACHE_TTL_JITTER  # the ttls vary randomly by this fraction
+    refresh_beta: float = CACHE_REFRESH_BETA  # how eagerly values get refreshed before they expire
+    dumps: Callable[[Any], str] = str
+    loads: Callable[[str], Any] = str
+
+
+class CacheStats:
+    """
+    Counts the lookups of a ``CacheNamespace``.
+    """
+
+    local_hits: int
+    redis_hits: int
+    misses: int
+    loads: Histogram  # seconds per loader call
+
+    def __init__(self):
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.loads = Histogram()
+
+    @property
+    def lookups(self) -> int:
+        return self.local_hits + self.redis_hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return (self.local_hits + self.redis_hits) / self.lookups if self.lookups else 0.0
+
+
+class CacheNamespace:
+    """
+    A two-tier cache for the keys ``<name>:<key>``, an in-process ``LRUCache`` in front of redis.
+
+    Notes
+    -----
+    Values are serialized to strings by the policy's ``dumps`` and read with its ``loads``.
+    Without a ``bus`` the local copies are only invalidated in this process, therefore keep ``local_ttl`` short.
+
+    With a ``breaker`` redis failures don't raise: lookups fall back to the local cache and the loader,
+    writes which didn't reach redis are deleted there once it's back.
+
+    To avoid keys expiring (and getting loaded from the database) all at once, their ttl is
+    randomized by ``jitter`` and ``get_or_load`` refreshes values in the background shortly before
+    they expire (probabilistic early expiration, the closer to the expiry the more likely).
+    """
+
+    namespaces: ClassVar[dict[str, "CacheNamespace"]] = {}
+
+    name: str
+    policy: CachePolicy
+    stats: CacheStats
+    load_time: float  # moving average in seconds
+    local: LRUCache[str, str]
+    generation: int  # changes with every key
+    bus: Optional[InvalidationBus]
+    breaker: Optional[CircuitBreaker]
+    _redis: Redis
+    _loads: SingleFlight
+    _fetches: DataLoader[str, tuple[Optional[bytes], int]]
+    _refreshes: set[Task]
+    _dirty: set[str]  # keys which may be outdated in redis
+    _reading: dict[str, int]  # the amount of lookups waiting for a key
+    _changed: dict[str, int]  # the generation a key being read changed at last
+    _cleared: int  # the generation all keys changed at last
+
+    def __init__(
+        self,
+        name: str,
+        redis_: Redis,
+        policy: Optional[CachePolicy] = None,
+        bus: Optional[InvalidationBus] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        **overrides: Any,
+    ):
+        """
+        Parameters
+        ----------
+        name: str
+            The prefix of the redis keys.
+        redis_: Redis
+            The redis client.
+        policy: CachePolicy, optional
+            How the values get cached, defaults to the global ``CACHE_*`` settings.
+        bus: InvalidationBus, optional
+            Evicts changed values from the local caches of the other processes.
+        breaker: CircuitBreaker, optional
+            Guards the calls to redis.
+        overrides: Any
+            Fields of the policy to replace, e.g. ``ttl=60``.
+        """
+        policy = (policy or CachePolicy())._replace(**overrides)
+        configured = {k: type(getattr(policy, k))(v) for k, v in CACHE_POLICIES.get(name, {}).items()}
+        self.name = name
+        self.policy = policy._replace(**configured)
+        self.stats = CacheStats()
+        self.load_time = 0.0
+        self.local = LRUCache(maxsize=self.policy.local_size, ttl=self.policy.local_ttl)
+        self.generation = 0
+        self.bus = bus
+        self.breaker = breaker
+        self._redis = redis_
+        self._loads = SingleFlight()
+        self._fetches = DataLoader(self._fetch_many)
+        self._refreshes = set()
+        self._dirty = set()
+        self._reading = {}
+        self._changed = {}
+        self._cleared = 0
+        CacheNamespace.namespaces[name] = self
+        if bus is not None:
+            bus.subscribe(name, self._evict)
+        if breaker is not None:
+            breaker.on_recovery(self._repair)
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    def _ttl(self, negative: bool = False) -> int:
+        ttl = self.policy.negative_ttl if negative else self.policy.ttl
+        return max(1, round(ttl * uniform(1 - self.policy.jitter, 1 + self.policy.jitter)))
+
+    def _value(self, value: Optional[str]) -> Any:
+        return None if value is None or value == _NEGATIVE else self.policy.loads(value)
+
+    async def _call(self, func: Callable[..., Awaitable[T]], *args: Any) -> T | object:
+        """
+        Calls redis, returns ``_UNAVAILABLE`` instead of raising if it failed and a breaker is used.
+        """
+        if self.breaker is None:
+            return await func(*args)
+        try:
+            return await self.breaker.call(func, *args)
+        except CircuitOpenError:
+            return _UNAVAILABLE
+        except Exception as e:  # noqa
+            logger.debug(f"Redis call for {self.name!r} failed: {e!r}")
+            return _UNAVAILABLE
+
+    @contextmanager
+    def _track(self, *keys: str) -> Iterator[Callable[[str], bool]]:
+        """
+        Tracks changes of the keys while they're looked up.
+
+        Yields
+        ------
+        Callable[[str], bool]
+            Whether a key is unchanged since, only then the looked up value may be cached locally.
+        """
+        generation = self.generation
+        for key in keys:
+            self._reading[key] = self._reading.get(key, 0) + 1
+        try:
+            yield lambda key: self._changed.get(key, 0) <= generation and self._cleared <= generation
+        finally:
+            for key in keys:
+                if (reading := self._reading.pop(key) - 1) > 0:
+                    self._reading[key] = reading
+                else:
+                    self._changed.pop(key, None)
+
+    def _change(self, keys: Iterable[str]) -> NoReturn:
+        self.generation += 1
+        for key in keys:
+            if key in self._reading:
+                self._changed[key] = self.generation
+
+    async def get(self, key: str) -> Any:
+        if (value := self.local.get(key)) is not None:
+            self.stats.local_hits += 1
+            return self._value(value)
+
+        with self._track(key) as unchanged:
+            if (raw := await self._call(self._redis.get, self._key(key))) is None or raw is _UNAVAILABLE:
+                self.stats.misses += 1
+                return None
+
+            self.stats.redis_hits += 1
+            value = _decode(raw)
+            if unchanged(key):  # not invalidated while waiting for redis
+                self.local.set(key, value)
+        return self._value(value)
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Returns the cached value, on a miss it's loaded and cached.
+
+        Parameters
+        ----------
+        key: str
+            The key.
+        loader: Callable[[], Awaitable[Any]]
+            Loads the value (e.g. from the database), ``None`` gets cached for ``negative_ttl``.
+            Concurrent misses of a key share one call, refreshes run it in a database session of their own.
+            The redis lookups of concurrent calls are batched into one round trip.
+
+        Returns
+        -------
+        Any
+            The value, ``None`` if the loader didn't find it.
+        """
+        if (value := self.local.get(key)) is not None:
+            self.stats.local_hits += 1
+            return self._value(value)
+
+        with self._track(key) as unchanged:
+            raw, pttl = await self._fetches.load(key)
+            if raw is not None and unchanged(key):
+                self.local.set(key, _decode(raw))
+        if raw is None:
+            self.stats.misses += 1
+            return self._value(await self._loads.do(key, self._load, key, loader))
+
+        self.stats.redis_hits += 1
+        value = _decode(raw)
+        if self._refresh_early(pttl / 1000) and key not in self._loads:
+            task = create_task(self._refresh(key, loader))
+            self._refreshes.add(task)
+            task.add_done_callback(self._refreshes.discard)
+        return self._value(value)
+
+    async def _fetch_many(self, keys: list[str]) -> list[tuple[Optional[bytes], int]]:
+        """
+        Gets the values and remaining ttls (in milliseconds) of the keys, ``(None, -2)`` if redis is unavailable.
+        """
+        if (result := await self._call(self._get_with_pttl, [self._key(key) for key in keys])) is _UNAVAILABLE:
+            return [(None, -2)] * len(keys)
+        return result
+
+    async def _get_with_pttl(self, keys: list[str]) -> list[tuple[Optional[bytes], int]]:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.get(key).pttl(key)
+            results = await pipe.execute()
+        return list(zip(results[::2], results[1::2]))
+
+    async def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        """
+        Gets multiple values with at most one round trip (``MGET``) to redis.
+        """
+        out: dict[str, Optional[str]] = {key: self.local.get(key) for key in keys}
+        missing = [key for key, value in out.items() if value is None]
+        self.stats.local_hits += len(out) - len(missing)
+
+        if missing:
+            with self._track(*missing) as unchanged:
+                if (raws := await self._call(self._redis.mget, list(map(self._key, missing)))) is _UNAVAILABLE:
+                    raws = [None] * len(missing)
+                for key, raw in zip(missing, raws):
+                    if raw is None:
+                        self.stats.misses += 1
+                        continue
+                    self.stats.redis_hits += 1
+                    out[key] = value = _decode(raw)
+                    if unchanged(key):
+                        self.local.set(key, value)
+        return {key: self._value(value) for key, value in out.items()}
+
+    async def set_many(self, items: dict[str, Any], publish: bool = True) -> NoReturn:
+        """
+        Sets multiple values with one round trip (pipeline) to redis.
+        """
+        if not items:
+            return
+
+        values = {key: self.policy.dumps(value) for key, value in items.items()}
+        self._change(values)
+        for key, value in values.items():
+            self.local.set(key, value)
+        if await self._call(self._setex_many, values) is _UNAVAILABLE:
+            self._dirty.update(values)
+        elif publish:
+            await self._publish(values)
+
+    async def _setex_many(self, values: dict[str, str]) -> NoReturn:
+        async with self._redis.pipeline() as pipe:
+            for key, value in values.items():
+                pipe.setex(self._key(key), self._ttl(), value)
+            await pipe.execute()
+
+    async def set(self, key: str, value: Any, publish: bool = True) -> NoReturn:  # noqa A003
+        """
+        Sets a value, ``publish=False`` skips the invalidation in the other processes
+        (e.g. when the value has just been loaded from the database and didn't change).
+        """
+        value = self.policy.dumps(value)
+        self._change([key])
+        self.local.set(key, value)
+        if await self._call(self._redis.setex, self._key(key), self._ttl(), value) is _UNAVAILABLE:
+            self._dirty.add(key)
+        elif publish:
+            await self._publish([key])
+
+    async def invalidate(self, key: str) -> NoReturn:
+        self.invalidate_local(key)
+        if await self._call(self._redis.delete, self._key(key)) is _UNAVAILABLE:
+            self._dirty.add(key)
+        else:
+            await self._publish([key])
+
+    async def clear(self) -> NoReturn:
+        """
+        Clears the local copies of all processes, the values in redis stay.
+        """
+        self.clear_local()
+        await self._publish(None)
+
+    async def flush(self, prefix: str = "", batch_size: int = 500) -> int:
+        """
+        Removes the keys ``<name>:<prefix>*`` from redis and the local caches of all processes.
+
+        Notes
+        -----
+        The keys are found with an incremental ``SCAN`` and removed with ``UNLINK`` (which frees them
+        in the background) in batches, therefore redis never gets blocked and other keys stay untouched.
+
+        Parameters
+        ----------
+        prefix: str
+            Only keys starting with it are removed, e.g. ``"<extension>."``.
+        batch_size: int
+            The amount of keys to scan per round trip.
+
+        Returns
+        -------
+        int
+            The amount of removed redis keys.
+        """
+        if prefix:
+            self._change([key for key in self._reading if key.startswith(prefix)])
+            self.local.pop_if(lambda k: k.startswith(prefix))
+        else:
+            self.clear_local()
+
+        removed, cursor = 0, 0
+        pattern = _glob_escape(self._key(prefix)) + "*"
+        while True:
+            cursor, keys = await self._redis.scan(cursor, match=pattern, count=batch_size)
+            if keys:
+                removed += await self._redis.unlink(*keys)
+                if prefix:
+                    await self._publish(_decode(k)[len(self.name) + 1 :] for k in keys)
+            if not cursor:
+                break
+
+        if not prefix:
+            await self._publish(None)
+        return removed
+
+    def invalidate_local(self, key: str) -> NoReturn:
+        self._change([key])
+        self.local.pop(key)
+
+    def clear_local(self) -> NoReturn:
+        self.generation += 1
+        self._cleared = self.generation
+        self.local.clear()
+
+    def _refresh_early(self, remaining: float) -> bool:
+        # XFetch: redis is only asked once per local ttl, therefore a refresh has to start that much earlier
+        if self.policy.refresh_beta <= 0 or remaining <= 0 or not self.load_time:
+            return False
+        delta = self.load_time + self.local.ttl
+        return -delta * self.policy.refresh_beta * log(1 - random()) >= remaining
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> str:
+        with self._track(key) as unchanged:
+            start = perf_counter()
+            value = await loader()
+            duration = perf_counter() - start
+            self.stats.loads.observe(duration)
+            self.load_time = duration if not self.load_time else 0.8 * self.load_time + 0.2 * duration
+
+            value = _NEGATIVE if value is None else self.policy.dumps(value)
+            if unchanged(key):  # a value set while loading wins
+                self.local.set(key, value)
+                await self._call(self._redis.setex, self._key(key), self._ttl(negative=value == _NEGATIVE), value)
+        return value
+
+    async def _refresh(self, key: str, loader: Callable[[], Awaitable[Any]]) -> NoReturn:
+        from .database import db_context
+
+        try:
+            async with db_context():
+                await self._loads.do(key, self._load, key, loader)
+        except Exception:  # noqa
+            # the value is still cached, the next miss loads it again
+            logger.exception(f"Couldn't refresh {self._key(key)!r}")
+
+    async def _repair(self) -> NoReturn:
+        # values changed while redis was unavailable, the old ones might still be there
+        if not (keys := list(self._dirty)):
+            return
+        self._dirty.difference_update(keys)
+        if await self._call(self._redis.unlink, *map(self._key, keys)) is _UNAVAILABLE:
+            self._dirty.update(keys)
+            return
+        logger.info(f"Removed {len(keys)} outdated keys of {self.name!r} from redis")
+        await self._publish(keys)
+
+    async def _publish(self, keys: Optional[Iterable[str]]) -> NoReturn:
+        if self.bus is not None:
+            await self.bus.publish(self.name, keys)
+
+    def _evict(self, keys: Optional[list[str]]) -> NoReturn:
+        if keys is None:
+            self.clear_local()
+        for key in keys or ():
+            self.invalidate_local(key)
+
+
+# cached in place of values which don't exist
+_NEGATIVE = "\x00"
+
+
+# returned by CacheNamespace._call if redis couldn't be reached
+_UNAVAILABLE = object()
+
+
+def _glob_escape(pattern: str) -> str:
+    return re.sub(r"([*?\[\]\\])", r"\\\1", pattern)
+
+
+def _decode(raw: bytes | str) -> str:
+    return raw.decode() if isinstance(raw, bytes) else str(raw)
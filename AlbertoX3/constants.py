@@ -10,7 +10,7 @@ from functools import partial
 from naff.client.const import Absent, Missing
 from naff.models.discord.user import Member, User
 from pathlib import Path
-from typing import Awaitable, Callable, NoReturn, TYPE_CHECKING
+from typing import NoReturn, TYPE_CHECKING
 from yaml import safe_load
 from .contributors import Contributor
 from .errors import InvalidPermissionLevelError
@@ -18,7 +18,7 @@ from .misc import FormatStr, PrimitiveExtension
 
 if TYPE_CHECKING:
     # needed for type hinting and to avoid circular imports
-    from .permission import BasePermissionLevel, PermissionLevel
+    from .permission import BasePermissionLevel, MemberLevelCache, PermissionLevel
 
 
 LIB_PATH: Path = Path(__file__).parent
@@ -158,8 +158,7 @@ class Config:
         permission_level_default_raw: str,
         permission_default_overrides_raw: dict[str, dict[str, str]],
     ) -> NoReturn:
-        from .permission import BasePermissionLevel, PermissionLevel
-        from .settings import RoleSettings
+        from .permission import BasePermissionLevel, MemberLevelCache, PermissionLevel
 
         permission_levels: dict[str, PermissionLevel] = {
             "public": PermissionLevel(0, ["public", "p"], "Public", [], [])
@@ -186,8 +185,9 @@ class Config:
             k.upper(): v for k, v in sorted(permission_levels.items(), key=lambda pl: pl[1].level, reverse=True)
         }
         cls.PERMISSION_LEVELS = BasePermissionLevel("PermissionLevel", permission_levels)
+        cls.PERMISSION_LEVELS._by_level = {level.level: level for level in cls.PERMISSION_LEVELS}
         cls.PERMISSION_LEVELS._get_permission_level = classmethod(
-            partial(_get_permission_level, permission_levels, RoleSettings.get)
+            partial(_get_permission_level, MemberLevelCache(permission_levels.values()))
         )
 
         cls.PERMISSION_LEVEL_TEAM = getattr(cls.PERMISSION_LEVELS, permission_level_team_raw.upper())
@@ -201,28 +201,14 @@ class Config:
 
 
 async def _get_permission_level(
-    permission_levels: dict[str, "PermissionLevel"],
-    get_role_setting: Callable[[str], Awaitable[int]],  # is AlbertoX3.settings.RoleSettings.get
+    member_levels: "MemberLevelCache",
     cls: "BasePermissionLevel",
     member: User | Member,
 ) -> "BasePermissionLevel":
     if isinstance(member, User):
         return cls.PUBLIC
 
-    roles = {role.id for role in member.roles}
-
-    async def has_role(role_name: str) -> bool:
-        return await get_role_setting(role_name) in roles
-
-    for k, v in permission_levels.items():
-        if any(getattr(member.guild_permissions, p.upper()) for p in v.guild_permissions):
-            return getattr(cls, k.upper())
-
-        for r in v.roles:
-            if await has_role(r):
-                return getattr(cls, k.upper())
-
-    return cls.PUBLIC
+    return cls.from_level(await member_levels.resolve(member))
 
 
 class StyleConfig:
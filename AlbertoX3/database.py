@@ -1,40 +1,81 @@
 __all__ = (
     "select",
     "filter_by",
+    "bound_filter_by",
     "exists",
     "delete",
     "Base",
     "UTCDatetime",
+    "TimedQueuePool",
+    "LazySession",
+    "Page",
     "DB",
     "db_context",
     "db_wrapper",
     "get_database",
+    "get_redis",
     "db",
     "redis",
+    "redis_breaker",
+    "invalidation_bus",
 )
 
 
+import orjson
 from aioredis.client import Redis
 from asyncio.locks import Event
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
 from contextlib import asynccontextmanager
 from contextvars import ContextVar
 from datetime import datetime, timezone
-from functools import wraps, partial
+from functools import lru_cache, wraps, partial
+from importlib.util import module_from_spec, spec_from_file_location
+from itertools import cycle
+from sqlalchemy.dialects import mysql, postgresql, sqlite
 from sqlalchemy.ext.asyncio.engine import AsyncEngine, create_async_engine
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from sqlalchemy.engine.url import URL
 from sqlalchemy.future import select as sa_select
+from sqlalchemy.engine.base import Connection
+from sqlalchemy.event import listen
+from sqlalchemy.exc import DisconnectionError
+from sqlalchemy.inspection import inspect
 from sqlalchemy.orm import selectinload
 from sqlalchemy.orm.decl_api import DeclarativeMeta, registry as sa_registry
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
 from sqlalchemy.sql.base import Executable
 from sqlalchemy.sql.dml import Delete
-from sqlalchemy.sql.expression import delete as sa_delete, exists as sa_exists
+from sqlalchemy.sql.expression import (
+    delete as sa_delete,
+    exists as sa_exists,
+    insert as sa_insert,
+    text,
+    bindparam,
+    tuple_,
+)
 from sqlalchemy.sql.functions import count
 from sqlalchemy.sql.schema import MetaData, Table
 from sqlalchemy.sql.selectable import Exists, Select
 from sqlalchemy.sql.sqltypes import DateTime
 from sqlalchemy.sql.type_api import TypeDecorator
-from typing import Any, AsyncIterable, Awaitable, Callable, NoReturn, Optional, ParamSpec, TypeVar
+from time import monotonic, perf_counter
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Iterator,
+    Awaitable,
+    Callable,
+    NamedTuple,
+    Iterable,
+    NoReturn,
+    Optional,
+    ParamSpec,
+    TYPE_CHECKING,
+    TypeVar,
+)
+from .aio import CircuitBreaker
 from .environment import (
     DB_DRIVER,
     DB_HOST,
@@ -46,13 +87,37 @@ from .environment import (
     DB_POOL_SIZE,
     DB_POOL_MAX_OVERFLOW,
     DB_SHOW_SQL_STATEMENTS,
+    DB_REPLICA_HOSTS,
+    DB_WRITE_BEHIND,
+    DB_WRITE_BEHIND_MAX_ROWS,
+    DB_WRITE_BEHIND_INTERVAL,
+    DB_WRITE_BEHIND_MAX_QUEUE,
+    DB_ENTITY_CACHE_SIZE,
+    DB_ENTITY_CACHE_TTL,
+    DB_RECORD_STATEMENTS,
+    REDIS_BACKEND,
+    REDIS_BREAKER_RECOVERY,
+    REDIS_BREAKER_THRESHOLD,
     REDIS_DB,
     REDIS_HOST,
     REDIS_PORT,
     REDIS_PASSWORD,
+    REDIS_SLOW_CALL,
+    REDIS_TIMEOUT,
 )
+from .cache import EntityCache, InvalidationBus
+from .errors import InvalidCursorError
+from .memory_redis import MemoryRedis
+from .metrics import MemoryMetrics, MetricsSink
+from .routing import RoutingSession
+from .statements import StatementRecorder
+from .write_behind import WriteBehindBuffer
 from ._utils_essentials import get_logger
 
+if TYPE_CHECKING:
+    # only needed for type hinting
+    from .misc import PrimitiveExtension
+
 
 T = TypeVar("T")
 P = ParamSpec("P")
@@ -60,14 +125,6 @@ P = ParamSpec("P")
 logger = get_logger(__name__)
 
 
-redis: Redis = Redis(
-    host=REDIS_HOST,
-    port=REDIS_PORT,
-    db=REDIS_DB,
-    password=REDIS_PASSWORD,
-)
-
-
 # Note:
 # this file is "inspired" by https://github.com/PyDrocsid/library/blob/develop/PyDrocsid/database.py
 
@@ -76,6 +133,23 @@ def select(entity: type[T], *args: Any) -> Select:
     if not args:
         return sa_select(entity)
 
+    # statements are immutable, therefore the same shape can be handed out again
+    try:
+        return _select_shape(entity, _hashable(args))
+    except TypeError:  # unhashable entity or option
+        return _build_select(entity, args)
+
+
+def _hashable(args: tuple) -> tuple:
+    return tuple(tuple(arg) if isinstance(arg, list) else arg for arg in args)
+
+
+@lru_cache(maxsize=1024)
+def _select_shape(entity: type[T], args: tuple) -> Select:
+    return _build_select(entity, args)
+
+
+def _build_select(entity: type[T], args: tuple) -> Select:
     options = []
     for arg in args:
         if isinstance(arg, (tuple, list)):
@@ -94,6 +168,34 @@ def filter_by(cls: type[object], *args: Any, **kwargs: Any) -> Select:
     return select(cls, *args).filter_by(**kwargs)
 
 
+def bound_filter_by(cls: type[object], *args: Any, **kwargs: Any) -> tuple[Select, dict[str, Any]]:
+    """
+    Like ``filter_by``, but the values are passed as parameters to a memoized statement.
+
+    Notes
+    -----
+    Reusing the same statement object skips building it and SQLAlchemy's cache-key generation,
+    ``None`` values become ``IS NULL`` like with ``filter_by``.
+
+    Returns
+    -------
+    tuple[Select, dict[str, Any]]
+        The statement and its parameters, pass both to ``DB.exec``/``DB.first``.
+    """
+    keys = tuple(sorted(kwargs))
+    nulls = frozenset(k for k in keys if kwargs[k] is None)
+    params = {f"filter_by_{k}": v for k, v in kwargs.items() if v is not None}
+    try:
+        return _filter_by_shape(cls, _hashable(args), keys, nulls), params
+    except TypeError:  # unhashable entity or option
+        return filter_by(cls, *args, **kwargs), {}
+
+
+@lru_cache(maxsize=1024)
+def _filter_by_shape(cls: type[object], args: tuple, keys: tuple[str, ...], nulls: frozenset[str]) -> Select:
+    return select(cls, *args).filter_by(**{k: None if k in nulls else bindparam(f"filter_by_{k}") for k in keys})
+
+
 def exists(*entities: Any, **kwargs: Any) -> Exists:
     return sa_exists(*entities, **kwargs)
 
@@ -134,14 +236,164 @@ class UTCDatetime(TypeDecorator):
         return datetime
 
 
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    A pool which remembers how long the checkout had to wait for a connection.
+    """
+
+    def _do_get(self) -> Any:
+        start = perf_counter()
+        record = super()._do_get()
+        record.info["checkout_wait"] = perf_counter() - start
+        return record
+
+
+class LazySession:
+    """
+    A proxy for an ``AsyncSession`` which only gets created once it's actually used.
+    """
+
+    writes: bool
+    closed: bool
+    created: float
+    _factory: Callable[[], AsyncSession]
+    _session: Optional[AsyncSession]
+    _close_event: Optional[Event]
+
+    def __init__(self, factory: Callable[[], AsyncSession]):
+        """
+        Parameters
+        ----------
+        factory: Callable[[], AsyncSession]
+            Creates the session on first use.
+        """
+        self.writes = False
+        self.closed = False
+        self.created = monotonic()
+        self._factory = factory
+        self._session = None
+        self._close_event = None
+
+    @property
+    def materialized(self) -> bool:
+        """
+        Whether the session has been created or not.
+        """
+        return self._session is not None
+
+    @property
+    def session(self) -> AsyncSession:
+        """
+        The actual session, creates it if it wasn't used before.
+        """
+        if self._session is None:
+            self._session = self._factory()
+        return self._session
+
+    @property
+    def has_writes(self) -> bool:
+        """
+        Whether the session has to be committed or not.
+        """
+        if (session := self._session) is None:
+            return False
+        if self.writes or session.info.get("flushed", False):
+            return True
+        return bool(session.new or session.dirty or session.deleted)
+
+    @property
+    def close_event(self) -> Event:
+        if self._close_event is None:
+            self._close_event = Event()
+            if self.closed:
+                self._close_event.set()
+        return self._close_event
+
+    def mark(self, statement: Executable) -> NoReturn:
+        """
+        Remembers the statement as a write if it isn't a plain SELECT.
+        """
+        if not getattr(statement, "is_select", False):
+            self.writes = True
+
+    def reset_writes(self) -> NoReturn:
+        self.writes = False
+        if self._session is not None:
+            self._session.info["flushed"] = False
+
+    def set_closed(self) -> NoReturn:
+        self.closed = True
+        if self._close_event is not None:
+            self._close_event.set()
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self.session, item)
+
+
+class Page(NamedTuple):
+    items: list
+    cursor: Optional[str]  # resumes after this page, None if it's the last one
+
+
+def _encode_cursor(values: tuple) -> str:
+    return urlsafe_b64encode(orjson.dumps(values)).decode("ascii")
+
+
+def _page_keys(statement: Select, keys: tuple[Any, ...]) -> tuple[bool, Callable[[Any], tuple]]:
+    """
+    Returns whether the statement selects model instances and a function which reads the keys of a result item.
+    """
+    columns = [getattr(k, "expression", k) for k in keys]
+    descriptions = statement.column_descriptions
+    if len(descriptions) == 1 and descriptions[0]["expr"] is (entity := descriptions[0].get("entity")):
+        # the attribute names of a model may differ from the column names
+        attributes = [inspect(entity).get_property_by_column(c).key for c in columns]
+        return True, lambda obj: tuple(getattr(obj, a) for a in attributes)
+
+    positions = []
+    for column in columns:
+        for i, selected in enumerate(statement.selected_columns):
+            if getattr(selected, "element", selected).compare(column):  # labels wrap the column
+                positions.append(i)
+                break
+        else:
+            raise ValueError(f"The statement doesn't select the key {column}")
+    return False, lambda row: tuple(row[i] for i in positions)
+
+
+def _decode_cursor(cursor: str, keys: tuple[Any, ...]) -> tuple:
+    try:
+        values = orjson.loads(urlsafe_b64decode(cursor.encode("ascii")))
+    except (BinasciiError, UnicodeEncodeError, orjson.JSONDecodeError):
+        raise InvalidCursorError(cursor) from None
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise InvalidCursorError(cursor)
+
+    decoded = []
+    for key, value in zip(keys, values):
+        if value is not None and isinstance(getattr(sa_type := key.expression.type, "impl", sa_type), DateTime):
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise InvalidCursorError(cursor) from None
+        decoded.append(value)
+    return tuple(decoded)
+
+
 class DB:
     """
     A database connection.
     """
 
     engine: AsyncEngine
-    _session: ContextVar[Optional[AsyncSession]]
-    _close_event: ContextVar[Optional[Event]]
+    replicas: list[AsyncEngine]
+    _replica_cycle: Iterator[AsyncEngine]
+    entity_cache: EntityCache
+    invalidation_bus: Optional[InvalidationBus]
+    metrics: MetricsSink
+    recorder: Optional[StatementRecorder]
+    write_behind: Optional[WriteBehindBuffer]
+    _session: ContextVar[Optional[LazySession]]
 
     def __init__(
         self,
@@ -155,6 +407,16 @@ class DB:
         pool_size: int = 20,
         max_overflow: int = 20,
         echo: bool = False,
+        entity_cache_size: int = 1024,
+        entity_cache_ttl: float = 60,
+        record_statements: bool = False,
+        write_behind: bool = False,
+        write_behind_max_rows: int = 500,
+        write_behind_interval: float = 1.0,
+        write_behind_max_queue: int = 10000,
+        replica_hosts: Iterable[str] = (),
+        metrics: Optional[MetricsSink] = None,
+        invalidation_bus: Optional[InvalidationBus] = None,
     ):
         """
         Parameters
@@ -166,7 +428,7 @@ class DB:
         port: int
             Port of the SQL server.
         database: str
-            Name of the database.
+            Name of the database, the path (or ``:memory:``) for sqlite.
         username: str
             Username to use for the database.
         password: str
@@ -179,25 +441,136 @@ class DB:
             The max amount of connections to allow over the pool.
         echo: bool
             Whether SQL queries should be logged or not.
+        entity_cache_size: int
+            The maximum amount of rows in the ``EntityCache``, ``0`` disables it.
+        entity_cache_ttl: float
+            The amount of seconds a row stays in the ``EntityCache``.
+        record_statements: bool
+            Whether executed statements should be recorded by a ``StatementRecorder`` or not.
+        write_behind: bool
+            Whether ``add_buffered`` should go through a ``WriteBehindBuffer`` or not.
+        write_behind_max_rows: int
+            The amount of pending rows which triggers a flush of the ``WriteBehindBuffer``.
+        write_behind_interval: float
+            The maximum amount of seconds a row stays in the ``WriteBehindBuffer``.
+        write_behind_max_queue: int
+            The maximum amount of rows the ``WriteBehindBuffer`` holds.
+        replica_hosts: Iterable[str]
+            Hosts (``host`` or ``host:port``) of read-replicas, the credentials are the same as for the primary.
+        metrics: MetricsSink, optional
+            Receives pool, session and statement metrics, defaults to ``MemoryMetrics``.
+        invalidation_bus: InvalidationBus, optional
+            Evicts committed changes from the ``EntityCache`` of the other processes.
         """
-        self.engine = create_async_engine(
-            URL.create(
-                drivername=driver,
-                username=username,
-                password=password,
-                host=host,
-                port=port,
-                database=database,
-            ),
-            pool_pre_ping=True,
-            pool_recycle=pool_recycle,
-            pool_size=pool_size,
-            max_overflow=max_overflow,
-            echo=echo,
-        )
+
+        def create_engine(host_: str, port_: int) -> AsyncEngine:
+            if driver.startswith("sqlite"):
+                # a file or, with database=":memory:", a single connection shared by all sessions
+                in_memory = database in {"", ":memory:"}
+                return create_async_engine(
+                    URL.create(drivername=driver, database=database),
+                    poolclass=StaticPool if in_memory else TimedQueuePool,
+                    connect_args={"check_same_thread": False},
+                    echo=echo,
+                    **({} if in_memory else {"pool_size": pool_size, "max_overflow": max_overflow}),
+                )
+
+            return create_async_engine(
+                URL.create(
+                    drivername=driver,
+                    username=username,
+                    password=password,
+                    host=host_,
+                    port=port_,
+                    database=database,
+                ),
+                poolclass=TimedQueuePool,
+                pool_pre_ping=True,
+                pool_recycle=pool_recycle,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                echo=echo,
+            )
+
+        self.engine = create_engine(host, port)
+        self.replicas = []
+        for replica in replica_hosts if not driver.startswith("sqlite") else ():
+            replica_host, _, replica_port = replica.partition(":")
+            self.replicas.append(create_engine(replica_host, int(replica_port or port)))
+        self._replica_cycle = cycle(self.replicas)
+
+        self.metrics = MemoryMetrics() if metrics is None else metrics
+        self._instrument(self.engine, "primary")
+        for i, replica in enumerate(self.replicas, start=1):
+            self._instrument(replica, f"replica-{i}")
+
+        self.entity_cache = EntityCache(maxsize=entity_cache_size, ttl=entity_cache_ttl)
+        self.invalidation_bus = invalidation_bus
+        if invalidation_bus is not None:
+            invalidation_bus.subscribe("entities", self._evict_tables)
+
+        self.recorder = None
+        if record_statements:
+            self.recorder = StatementRecorder()
+            for engine in (self.engine, *self.replicas):
+                self.recorder.attach(engine)
+
+        self.write_behind = None
+        if write_behind:
+            self.write_behind = WriteBehindBuffer(
+                self.engine,
+                max_rows=write_behind_max_rows,
+                interval=write_behind_interval,
+                max_queue=write_behind_max_queue,
+            )
 
         self._session = ContextVar("session", default=None)
-        self._close_event = ContextVar("close_event", default=None)
+
+    def _evict_tables(self, tables: Optional[list[str]]) -> NoReturn:
+        if tables is None:
+            self.entity_cache.clear()
+        for name in tables or ():
+            if (table := Base.metadata.tables.get(name)) is not None:
+                self.entity_cache.invalidate_table(table)
+
+    def _instrument(self, engine: AsyncEngine, name: str) -> NoReturn:
+        sync_engine = engine.sync_engine
+        prefix = f"db.{name}"
+
+        checked_out = 0
+
+        def checkout(_: Any, record: Any, __: Any) -> NoReturn:
+            nonlocal checked_out
+            checked_out += 1
+            self.metrics.gauge(f"{prefix}.pool.checked_out", checked_out)
+            if (wait := record.info.pop("checkout_wait", None)) is not None:
+                self.metrics.observe(f"{prefix}.pool.checkout_wait", wait)
+            if isinstance(pool := sync_engine.pool, QueuePool) and pool.overflow() > 0:
+                self.metrics.increment(f"{prefix}.pool.overflow_checkouts")
+
+        def checkin(*_: Any) -> NoReturn:
+            nonlocal checked_out
+            checked_out = max(0, checked_out - 1)
+            self.metrics.gauge(f"{prefix}.pool.checked_out", checked_out)
+
+        def invalidate(_: Any, __: Any, exception: Optional[BaseException]) -> NoReturn:
+            if isinstance(exception, DisconnectionError):
+                # raised by the pre-ping on checkout
+                self.metrics.increment(f"{prefix}.pool.pre_ping_failures")
+            else:
+                self.metrics.increment(f"{prefix}.pool.invalidations")
+
+        def before_cursor_execute(conn: Connection, *_: Any) -> NoReturn:
+            conn.info.setdefault("metrics_start", []).append(perf_counter())
+
+        def after_cursor_execute(conn: Connection, *_: Any) -> NoReturn:
+            self.metrics.observe(f"{prefix}.statement", perf_counter() - conn.info["metrics_start"].pop())
+
+        listen(sync_engine, "checkout", checkout)
+        listen(sync_engine, "checkin", checkin)
+        listen(sync_engine, "invalidate", invalidate)
+        listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+        listen(sync_engine, "after_cursor_execute", after_cursor_execute)
 
     async def create_tables(self) -> NoReturn:
         """
@@ -210,27 +583,265 @@ class DB:
         async with self.engine.begin() as conn:
             await conn.run_sync(partial(Base.metadata.create_all, tables=tables))
 
+    async def migrate(self, extensions: Iterable["PrimitiveExtension"]) -> NoReturn:
+        """
+        Creates missing tables and applies all pending migrations of the extensions.
+
+        Parameters
+        ----------
+        extensions: Iterable[PrimitiveExtension]
+            The extensions to migrate.
+        """
+        from .migrations import MigrationModel, Migrator, discover_migrations
+
+        await self.create_tables()
+
+        async with self.engine.connect() as lock:
+            if self.engine.dialect.name in {"mysql", "mariadb"}:
+                # other processes have to wait until the migrations are applied
+                await lock.execute(text("SELECT GET_LOCK('alberto_x3.migrations', 3600)"))
+            try:
+                async with self.engine.begin() as conn:
+                    applied = {
+                        tuple(r)
+                        for r in await conn.execute(sa_select(MigrationModel.extension, MigrationModel.version))
+                    }
+
+                migrator = Migrator(self.engine)
+                for migration in discover_migrations(extensions):
+                    if (migration.extension, migration.version) in applied:
+                        continue
+
+                    logger.info(f"Applying migration {migration.version} ({migration.name}) of {migration.extension!r}")
+                    spec = spec_from_file_location(
+                        f"{migration.extension}.migrations.{migration.path.stem}", migration.path
+                    )
+                    module = module_from_spec(spec)
+                    spec.loader.exec_module(module)
+                    await module.upgrade(migrator)
+
+                    async with self.engine.begin() as conn:
+                        await conn.execute(
+                            sa_insert(MigrationModel).values(
+                                extension=migration.extension,
+                                version=migration.version,
+                                name=migration.name,
+                                applied=datetime.utcnow(),
+                            )
+                        )
+            finally:
+                if self.engine.dialect.name in {"mysql", "mariadb"}:
+                    await lock.execute(text("SELECT RELEASE_LOCK('alberto_x3.migrations')"))
+
     async def add(self, obj: T, commit: bool = False) -> T:
+        self.entity_cache.invalidate(obj)
         self.session.add(obj)
         if commit:
             await self.commit()
         return obj
 
+    async def add_buffered(self, obj: T) -> T:
+        """
+        Adds an insert-only row (e.g. an audit-log entry) through the ``WriteBehindBuffer``.
+
+        Notes
+        -----
+        The row gets written later on, therefore the returned object won't get a primary key.
+        Falls back to ``add`` if the ``WriteBehindBuffer`` is disabled.
+        """
+        if self.write_behind is None:
+            return await self.add(obj)
+
+        table: Table = obj.__table__  # type: ignore
+        row = {c.name: v for c in table.columns if (v := getattr(obj, c.key, None)) is not None}
+        await self.write_behind.put(table, row)
+        return obj
+
+    async def upsert(
+        self,
+        model: type[T],
+        row: dict[str, Any],
+        conflict_keys: Optional[Iterable[str]] = None,
+        update: Optional[Iterable[str] | dict[str, Any]] = None,
+    ) -> NoReturn:
+        """
+        Inserts a row or updates it if it already exists, in a single statement.
+
+        Parameters
+        ----------
+        model: type[T]
+            The model to upsert into.
+        row: dict[str, Any]
+            The values of the row, by column-key.
+        conflict_keys: Iterable[str], optional
+            The unique columns identifying an existing row, defaults to the primary key.
+        update: Iterable[str], dict[str, Any], optional
+            The columns to overwrite if the row exists, defaults to all given non-key columns.
+            An empty iterable keeps existing rows as they are.
+            A dict sets the columns to values or expressions of the existing row instead (e.g. ``cases + 1``).
+        """
+        await self.upsert_many(model, [row], conflict_keys=conflict_keys, update=update)
+
+    async def upsert_many(
+        self,
+        model: type[T],
+        rows: list[dict[str, Any]],
+        conflict_keys: Optional[Iterable[str]] = None,
+        update: Optional[Iterable[str] | dict[str, Any]] = None,
+    ) -> NoReturn:
+        """
+        Inserts rows or updates the existing ones, in a single statement.
+
+        Notes
+        -----
+        Uses ``INSERT ... ON DUPLICATE KEY UPDATE`` on MySQL and ``INSERT ... ON CONFLICT`` otherwise.
+        MySQL checks all unique indexes regardless of ``conflict_keys``.
+
+        Parameters
+        ----------
+        model: type[T]
+            The model to upsert into.
+        rows: list[dict[str, Any]]
+            The values of the rows, by column-key. All rows must have the same keys.
+        conflict_keys: Iterable[str], optional
+            The unique columns identifying an existing row, defaults to the primary key.
+        update: Iterable[str], dict[str, Any], optional
+            The columns to overwrite if the row exists, defaults to all given non-key columns.
+            An empty iterable keeps existing rows as they are.
+            A dict sets the columns to values or expressions of the existing row instead (e.g. ``cases + 1``).
+
+        Raises
+        ------
+        NotImplementedError
+            If the dialect doesn't support upserts.
+        """
+        if not rows:
+            return
+
+        table: Table = model.__table__  # type: ignore
+        keys = [c.key for c in table.primary_key.columns] if conflict_keys is None else list(conflict_keys)
+        columns = [c for c in rows[0] if c not in keys] if update is None else list(update)
+
+        match dialect := self.engine.dialect.name:
+            case "mysql" | "mariadb":
+                statement = mysql.insert(table).values(rows)
+                if isinstance(update, dict):
+                    values = update
+                else:
+                    # updating a key with itself is a no-op, which makes it an INSERT IGNORE without ignoring other errors
+                    values = {c: statement.inserted[c] for c in columns or keys[:1]}
+                statement = statement.on_duplicate_key_update(values)
+            case "postgresql" | "sqlite":
+                statement = (postgresql if dialect == "postgresql" else sqlite).insert(table).values(rows)
+                if columns:
+                    values = update if isinstance(update, dict) else {c: statement.excluded[c] for c in columns}
+                    statement = statement.on_conflict_do_update(index_elements=keys, set_=values)
+                else:
+                    statement = statement.on_conflict_do_nothing(index_elements=keys)
+            case _:
+                raise NotImplementedError(f"Upserts aren't supported for {dialect!r}")
+
+        # a Core statement doesn't autoflush, pending changes of loaded rows would get lost otherwise
+        session = self.session
+        await session.flush()
+        await self.exec(statement)
+
+        # the upserted rows may be outdated now, db.get refreshes them
+        mapper = inspect(model)
+        attrs = [mapper.get_property_by_column(table.c[k]).key for k in keys]
+        upserted = {tuple(row[k] for k in keys) for row in rows}
+        for obj in [obj for obj in session.identity_map.values() if obj.__table__ is table]:
+            loaded = inspect(obj).dict  # doesn't load expired attributes
+            if all(a in loaded for a in attrs) and tuple(loaded[a] for a in attrs) in upserted:
+                session.expire(obj)
+
     async def delete(self, obj: T, commit: bool = False) -> T:
+        self.entity_cache.invalidate(obj)
         await self.session.delete(obj)
         if commit:
             await self.commit()
         return obj
 
     async def exec(self, statement: Executable, *args: Any, **kwargs: Any) -> Any:  # noqa: A003
+        self._session.get().mark(statement)
+        if getattr(statement, "is_dml", False):
+            self.entity_cache.invalidate_table(statement.table)  # type: ignore
+            self.session.info.setdefault("changed_tables", set()).add(statement.table.name)  # type: ignore
         return await self.session.execute(statement, *args, **kwargs)
 
     async def stream(self, statement: Executable, *args: Any, **kwargs: Any) -> AsyncIterable[T]:
+        self._session.get().mark(statement)
         return (await self.session.stream(statement, *args, **kwargs)).scalars()
 
     async def all(self, statement: Executable, *args: Any, **kwargs: Any) -> list[T]:  # noqa: A003
         return [x async for x in await self.stream(statement, *args, **kwargs)]
 
+    async def paginate(
+        self,
+        statement: Select,
+        key: Any | tuple[Any, ...],
+        page_size: int = 100,
+        cursor: Optional[str] = None,
+        descending: bool = False,
+    ) -> AsyncIterator[Page]:
+        """
+        Iterates over the result of a statement page by page using keyset-pagination.
+
+        Notes
+        -----
+        Every page is a separate query, therefore no cursor stays open between two pages.
+        ``key`` has to be unique (add the primary key as a tiebreaker otherwise) and should be indexed.
+        Unless the statement selects a single model, the key columns have to be selected (labels are fine).
+
+        Parameters
+        ----------
+        statement: Select
+            The statement to paginate, mustn't be ordered or limited already.
+        key: Column, tuple[Column, ...]
+            The column(s) to paginate by.
+        page_size: int
+            The maximum amount of rows per page.
+        cursor: str, optional
+            The cursor from a previous ``Page`` to resume after.
+        descending: bool
+            Whether to paginate in descending order or not.
+
+        Yields
+        ------
+        Page
+            The rows (or model instances) of the page and the cursor to resume after it.
+
+        Raises
+        ------
+        InvalidCursorError
+            If the cursor can't be decoded.
+        ValueError
+            If a key column isn't selected.
+        """
+        keys: tuple[Any, ...] = key if isinstance(key, tuple) else (key,)
+        entities, key_of = _page_keys(statement, keys)
+        last: Optional[tuple] = None if cursor is None else _decode_cursor(cursor, keys)
+        statement = statement.order_by(*(k.desc() if descending else k.asc() for k in keys)).limit(page_size)
+
+        while True:
+            paged = statement
+            if last is not None:
+                if len(keys) == 1:
+                    seek = keys[0] < last[0] if descending else keys[0] > last[0]
+                else:
+                    seek = tuple_(*keys) < tuple_(*last) if descending else tuple_(*keys) > tuple_(*last)
+                paged = paged.where(seek)
+
+            result = await self.exec(paged)
+            items = result.scalars().all() if entities else result.all()
+            if len(items) < page_size:
+                if items:
+                    yield Page(items, None)
+                return
+
+            last = key_of(items[-1])
+            yield Page(items, _encode_cursor(last))
+
     async def first(self, statement: Executable, *args: Any, **kwargs: Any) -> T:
         return (await self.exec(statement, *args, **kwargs)).scalar()
 
@@ -241,28 +852,70 @@ class DB:
         return await self.first(select(count()).select_from(*args, **kwargs))  # type: ignore
 
     async def get(self, cls: type[T], *args: Any, **kwargs: Any) -> T | None:
-        return await self.first(filter_by(cls, *args, **kwargs))
+        if args or (key := self.entity_cache.key(cls, kwargs)) is None:
+            return await self.first(*bound_filter_by(cls, *args, **kwargs))
+
+        session = self.session
+        if (obj := session.identity_map.get(key)) is not None:
+            if inspect(obj).expired:
+                await session.refresh(obj)
+            return obj
+        if (obj := self.entity_cache.get(key)) is not None:
+            return await session.merge(obj, load=False)
+
+        generation = self.entity_cache.generation
+        # a lagging replica might return a stale row, only rows read from the primary get cached
+        replica = session.info.get("replica") is not None and not session.info.get("pinned", False)
+        if (obj := await self.first(*bound_filter_by(cls, **kwargs))) is not None and not replica:
+            self.entity_cache.set(key, obj, generation)
+        return obj
 
     async def commit(self) -> NoReturn:
-        if self._session.get():
-            await self.session.commit()
+        # sessions which only read (or never ran anything) don't need the round trip
+        if (lazy := self._session.get()) is not None and lazy.has_writes:
+            await lazy.session.commit()
+            lazy.reset_writes()
+            if (tables := lazy.session.info.pop("changed_tables", None)) and self.invalidation_bus is not None:
+                await self.invalidation_bus.publish("entities", sorted(tables))
 
     async def close(self) -> NoReturn:
-        if self._session.get():
-            await self.session.close()
-            self._close_event.get().set()
-
-    def create_session(self) -> AsyncSession:
-        self._session.set(session := AsyncSession(self.engine, expire_on_commit=False))
-        self._close_event.set(Event())
+        if (lazy := self._session.get()) is not None:
+            if lazy.materialized:
+                await lazy.session.close()
+            else:
+                self.metrics.increment("db.session.unused")
+            if not lazy.closed:
+                self.metrics.observe("db.session.lifetime", monotonic() - lazy.created)
+            lazy.set_closed()
+
+    def create_session(self) -> LazySession:
+        self._session.set(session := LazySession(self._new_session))
         return session
 
+    def _new_session(self) -> AsyncSession:
+        info = {"entity_cache": self.entity_cache}
+        if not self.replicas:
+            return AsyncSession(self.engine, expire_on_commit=False, info=info)
+
+        # one replica per session, so consecutive reads see the same state
+        info["replica"] = next(self._replica_cycle).sync_engine
+        return AsyncSession(self.engine, expire_on_commit=False, info=info, sync_session_class=RoutingSession)
+
     @property
     def session(self) -> AsyncSession:
-        return self._session.get()
+        return self._session.get().session
 
     async def wait_for_close_event(self) -> NoReturn:
-        await self._close_event.get().wait()
+        await self._session.get().close_event.wait()
+
+    async def shutdown(self) -> NoReturn:
+        """
+        Writes all buffered rows and closes the connection pool.
+        """
+        if self.write_behind is not None:
+            await self.write_behind.close()
+        for engine in (self.engine, *self.replicas):
+            await engine.dispose()
 
 
 @asynccontextmanager
@@ -299,7 +952,40 @@ def get_database() -> DB:
         pool_size=DB_POOL_SIZE,
         max_overflow=DB_POOL_MAX_OVERFLOW,
         echo=DB_SHOW_SQL_STATEMENTS,
+        entity_cache_size=DB_ENTITY_CACHE_SIZE,
+        entity_cache_ttl=DB_ENTITY_CACHE_TTL,
+        record_statements=DB_RECORD_STATEMENTS,
+        write_behind=DB_WRITE_BEHIND,
+        write_behind_max_rows=DB_WRITE_BEHIND_MAX_ROWS,
+        write_behind_interval=DB_WRITE_BEHIND_INTERVAL,
+        write_behind_max_queue=DB_WRITE_BEHIND_MAX_QUEUE,
+        replica_hosts=DB_REPLICA_HOSTS,
+        invalidation_bus=invalidation_bus,
     )
 
 
+def get_redis() -> Redis | MemoryRedis:
+    """
+    Creates a redis client from environment variables.
+    """
+    if REDIS_BACKEND == "memory":
+        return MemoryRedis()
+    return Redis(
+        host=REDIS_HOST,
+        port=REDIS_PORT,
+        db=REDIS_DB,
+        password=REDIS_PASSWORD,
+    )
+
+
+redis: Redis = get_redis()
+redis_breaker: CircuitBreaker = CircuitBreaker(
+    "redis",
+    redis.ping,
+    threshold=REDIS_BREAKER_THRESHOLD,
+    timeout=REDIS_TIMEOUT,
+    slow_call=REDIS_SLOW_CALL,
+    recovery_interval=REDIS_BREAKER_RECOVERY,
+)
+invalidation_bus: InvalidationBus = InvalidationBus(redis, breaker=redis_breaker)
 db: DB = get_database()
@@ -12,11 +12,31 @@ __all__ = (
     "DB_POOL_SIZE",
     "DB_POOL_MAX_OVERFLOW",
     "DB_SHOW_SQL_STATEMENTS",
+    "DB_REPLICA_HOSTS",
+    "DB_WRITE_BEHIND",
+    "DB_WRITE_BEHIND_MAX_ROWS",
+    "DB_WRITE_BEHIND_INTERVAL",
+    "DB_WRITE_BEHIND_MAX_QUEUE",
+    "DB_ENTITY_CACHE_SIZE",
+    "DB_ENTITY_CACHE_TTL",
+    "DB_RECORD_STATEMENTS",
     "CACHE_TTL",
+    "CACHE_LOCAL_SIZE",
+    "CACHE_LOCAL_TTL",
+    "CACHE_TTL_JITTER",
+    "CACHE_NEGATIVE_TTL",
+    "CACHE_REFRESH_BETA",
+    "CACHE_POLICIES",
+    "SANCTIONS_REDIS",
+    "REDIS_BACKEND",
     "REDIS_HOST",
     "REDIS_PORT",
     "REDIS_DB",
     "REDIS_PASSWORD",
+    "REDIS_TIMEOUT",
+    "REDIS_SLOW_CALL",
+    "REDIS_BREAKER_THRESHOLD",
+    "REDIS_BREAKER_RECOVERY",
 )
 
 
@@ -50,9 +70,47 @@ DB_POOL_MAX_OVERFLOW: int = int(getenv("DB_POOL_MAX_OVERFLOW", 20))
 
 DB_SHOW_SQL_STATEMENTS: bool = get_bool(getenv("DB_SHOW_SQL_STATEMENTS", False))
 
+# comma separated, e.g. "replica-1,replica-2:3307" (port defaults to DB_PORT)
+DB_REPLICA_HOSTS: list[str] = [h.strip() for h in getenv("DB_REPLICA_HOSTS", "").split(",") if h.strip()]
+
+DB_WRITE_BEHIND: bool = get_bool(getenv("DB_WRITE_BEHIND", False))
+DB_WRITE_BEHIND_MAX_ROWS: int = int(getenv("DB_WRITE_BEHIND_MAX_ROWS", 500))
+DB_WRITE_BEHIND_INTERVAL: float = float(getenv("DB_WRITE_BEHIND_INTERVAL", 1.0))
+DB_WRITE_BEHIND_MAX_QUEUE: int = int(getenv("DB_WRITE_BEHIND_MAX_QUEUE", 10000))
+
+DB_ENTITY_CACHE_SIZE: int = int(getenv("DB_ENTITY_CACHE_SIZE", 1024))
+DB_ENTITY_CACHE_TTL: float = float(getenv("DB_ENTITY_CACHE_TTL", 60))
+
+DB_RECORD_STATEMENTS: bool = get_bool(getenv("DB_RECORD_STATEMENTS", False))
+
 CACHE_TTL: int = int(getenv("CACHE_TTL", 3600))
+# in-process copies in front of redis
+CACHE_LOCAL_SIZE: int = int(getenv("CACHE_LOCAL_SIZE", 4096))
+CACHE_LOCAL_TTL: float = float(getenv("CACHE_LOCAL_TTL", 5))
+# spreads the expiry of keys written at the same time, +-10% of CACHE_TTL
+CACHE_TTL_JITTER: float = float(getenv("CACHE_TTL_JITTER", 0.1))
+# missing rows are cached for a shorter time
+CACHE_NEGATIVE_TTL: int = int(getenv("CACHE_NEGATIVE_TTL", 60))
+# how eagerly values are refreshed before they expire, 0 disables it
+CACHE_REFRESH_BETA: float = float(getenv("CACHE_REFRESH_BETA", 1.0))
+# overrides per cache namespace, e.g. "permissions:ttl=600,local_ttl=30;settings:ttl=86400"
+CACHE_POLICIES: dict[str, dict[str, float]] = {
+    name.strip(): {k.strip(): float(v) for k, _, v in (o.partition("=") for o in options.split(",") if o.strip())}
+    for name, _, options in (p.partition(":") for p in getenv("CACHE_POLICIES", "").split(";") if p.strip())
+}
+
+# share the index of active bans/mutes between processes
+SANCTIONS_REDIS: bool = get_bool(getenv("SANCTIONS_REDIS", False))
 
+REDIS_BACKEND: str = getenv("REDIS_BACKEND", "redis")  # "memory" for an in-process stand-in
 REDIS_HOST: str = getenv("REDIS_HOST", "localhost")
 REDIS_PORT: int = int(getenv("REDIS_PORT", 6379))
 REDIS_DB: int = int(getenv("REDIS_DB", 0))
 REDIS_PASSWORD: str = getenv("REDIS_PASSWORD", "")
+
+# the circuit breaker in front of the caches: after REDIS_BREAKER_THRESHOLD failed (or slow) calls in a row
+# they fall back to the in-process caches and the database until redis answers pings again
+REDIS_TIMEOUT: float = float(getenv("REDIS_TIMEOUT", 0.5))
+REDIS_SLOW_CALL: float = float(getenv("REDIS_SLOW_CALL", 0.1))
+REDIS_BREAKER_THRESHOLD: int = int(getenv("REDIS_BREAKER_THRESHOLD", 5))
+REDIS_BREAKER_RECOVERY: float = float(getenv("REDIS_BREAKER_RECOVERY", 5))
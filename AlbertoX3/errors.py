@@ -5,6 +5,8 @@ __all__ = (
     "UnrecognisedPermissionLevelError",
     "InvalidPermissionLevelError",
     "GatherAnyError",
+    "CircuitOpenError",
+    "InvalidCursorError",
     "UnrecognisedBooleanError",
     "TranslationError",
     "UnsupportedTranslationTypeError",
@@ -62,6 +64,26 @@ class GatherAnyError(AlbertoX3Error):
         return f"An error occurred in coroutine {self.idx} while gathering: {self.exception}"
 
 
+class CircuitOpenError(AlbertoX3Error):
+    name: str
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __str__(self) -> str:
+        return f"{self.name} is unavailable, the circuit breaker is open!"
+
+
+class InvalidCursorError(AlbertoX3Error, ValueError):
+    cursor: str
+
+    def __init__(self, cursor: str):
+        self.cursor = cursor
+
+    def __str__(self) -> str:
+        return f"Unable to resume pagination from cursor {self.cursor!r}!"
+
+
 class UnrecognisedBooleanError(AlbertoX3Error):
     obj: object
 
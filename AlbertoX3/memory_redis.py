@@ -0,0 +1,514 @@
+__all__ = ("MemoryRedis",)
+
+
+from aioredis.exceptions import DataError, RedisError, ResponseError, WatchError
+from asyncio.exceptions import TimeoutError
+from asyncio.queues import Queue, QueueEmpty
+from asyncio.tasks import sleep, wait_for
+import re
+from functools import lru_cache
+from heapq import nsmallest
+from inspect import isawaitable
+from itertools import count as counter
+from time import monotonic
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Iterator, Optional
+
+_KEY = bytes | str
+_VALUE = bytes | str | int | float
+
+_WRONGTYPE = "WRONGTYPE Operation against a key holding the wrong kind of value"
+
+
+def _encode(value: _VALUE) -> bytes:
+    # same rules as aioredis' encoder
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, bool):
+        raise DataError("Invalid input of type: 'bool'. Convert to a bytes, string, int or float first.")
+    if isinstance(value, str):
+        return value.encode()
+    if isinstance(value, int):
+        return str(value).encode()
+    if isinstance(value, float):
+        return repr(value).encode()
+    raise DataError(f"Invalid input of type: {type(value).__name__!r}. Convert to a bytes, string, int or float first.")
+
+
+class _Hash(dict[bytes, bytes]):
+    pass
+
+
+class _ZSet(dict[bytes, float]):
+    pass
+
+
+def _list(keys: _KEY | Iterable[_KEY], args: tuple[_KEY, ...]) -> list[_KEY]:
+    if isinstance(keys, (bytes, str)):
+        return [keys, *args]
+    return [*keys, *args]
+
+
+class MemoryPipeline:
+    """
+    Queues commands for a ``MemoryRedis`` until ``execute`` gets awaited.
+
+    Notes
+    -----
+    Like with ``aioredis``, commands run immediately between ``watch`` and ``multi``,
+    ``execute`` raises ``WatchError`` if a watched key changed since it has been watched.
+    """
+
+    _redis: "MemoryRedis"
+    _commands: list[tuple[str, tuple, dict]]
+    _watched: Optional[dict[bytes, int]]  # the versions of the watched keys
+    _multi: bool
+
+    def __init__(self, redis: "MemoryRedis"):
+        self._redis = redis
+        self._commands = []
+        self._watched = None
+        self._multi = False
+
+    async def __aenter__(self) -> "MemoryPipeline":
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        self.reset()
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def __getattr__(self, item: str) -> Any:
+        if item.startswith("_") or not callable(getattr(self._redis, item, None)):
+            raise AttributeError(item)
+
+        def queue(*args: Any, **kwargs: Any) -> "MemoryPipeline" | Awaitable[Any]:
+            if self._watched is not None and not self._multi:
+                return getattr(self._redis, item)(*args, **kwargs)
+            self._commands.append((item, args, kwargs))
+            return self
+
+        return queue
+
+    async def watch(self, *names: _KEY) -> bool:
+        if self._multi:
+            raise RedisError("Cannot issue a WATCH after a MULTI")
+        self._watched = (self._watched or {}) | {key: self._redis._version(key) for key in map(_encode, names)}
+        return True
+
+    async def unwatch(self) -> bool:
+        self._watched = None
+        return True
+
+    def multi(self) -> None:
+        if self._multi:
+            raise RedisError("Cannot issue nested calls to MULTI")
+        if self._commands:
+            raise RedisError("Commands without an initial WATCH have already been issued")
+        self._multi = True
+
+    def reset(self) -> None:
+        self._commands = []
+        self._watched = None
+        self._multi = False
+
+    async def execute(self, raise_on_error: bool = True) -> list[Any]:
+        # commands run back to back without awaiting anything else, therefore they're atomic
+        commands, watched = self._commands, self._watched
+        self.reset()
+        if watched is not None and any(self._redis._version(key) != version for key, version in watched.items()):
+            raise WatchError("Watched variable changed.")
+
+        results = []
+        for name, args, kwargs in commands:
+            try:
+                results.append(await getattr(self._redis, name)(*args, **kwargs))
+            except ResponseError as e:
+                if raise_on_error:
+                    raise
+                results.append(e)
+        return results
+
+
+class MemoryPubSub:
+    """
+    Receives the messages published on the subscribed channels of a ``MemoryRedis``.
+    """
+
+    _redis: "MemoryRedis"
+    _messages: Queue
+    channels: set[bytes]
+
+    def __init__(self, redis: "MemoryRedis"):
+        self._redis = redis
+        self._messages = Queue()
+        self.channels = set()
+
+    @property
+    def subscribed(self) -> bool:
+        return bool(self.channels)
+
+    async def subscribe(self, *channels: _KEY) -> None:
+        for channel in map(_encode, channels):
+            self.channels.add(channel)
+            self._redis._subscribers.setdefault(channel, set()).add(self)
+            self._messages.put_nowait({"type": "subscribe", "pattern": None, "channel": channel, "data": 1})
+
+    async def unsubscribe(self, *channels: _KEY) -> None:
+        for channel in list(map(_encode, channels)) or list(self.channels):
+            self.channels.discard(channel)
+            self._redis._subscribers.get(channel, set()).discard(self)
+            self._messages.put_nowait({"type": "unsubscribe", "pattern": None, "channel": channel, "data": 0})
+
+    async def get_message(self, ignore_subscribe_messages: bool = False, timeout: float = 0.0) -> Optional[dict]:
+        try:
+            message = await wait_for(self._messages.get(), timeout) if timeout else self._messages.get_nowait()
+        except (QueueEmpty, TimeoutError):
+            return None
+        if ignore_subscribe_messages and message["type"] != "message":
+            return None
+        return message
+
+    async def listen(self) -> AsyncIterator[dict]:
+        while self.subscribed:
+            yield await self._messages.get()
+
+    async def reset(self) -> None:
+        await self.unsubscribe()
+        self._messages = Queue()
+
+    close = reset
+
+
+class MemoryRedis:
+    """
+    An in-process stand-in for ``aioredis.Redis`` (strings, hashes, sorted sets, pipelines, transactions and pub/sub).
+
+    Notes
+    -----
+    Values are returned as ``bytes`` like with ``aioredis`` (``decode_responses=False``).
+    Expired keys are removed lazily on access.
+    """
+
+    _data: dict[bytes, Any]
+    _expires: dict[bytes, float]
+    _versions: dict[bytes, int]  # changed by every write, for WATCH
+    _writes: Iterator[int]
+    _subscribers: dict[bytes, set[MemoryPubSub]]
+    _cursors: dict[int, bytes]  # the last key returned by a scan
+    _cursor_ids: Iterator[int]
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._versions = {}
+        self._writes = counter(1)
+        self._subscribers = {}
+        self._cursors = {}
+        self._cursor_ids = counter(1)
+
+    # internals
+
+    def _alive(self, key: bytes) -> bool:
+        if (expires := self._expires.get(key)) is not None and expires <= monotonic():
+            self._pop(key)
+        return key in self._data
+
+    def _touch(self, key: bytes) -> None:
+        self._versions[key] = next(self._writes)
+
+    def _version(self, key: bytes) -> int:
+        self._alive(key)  # expiring counts as a change
+        return self._versions.get(key, 0)
+
+    def _get(self, name: _KEY, kind: type) -> Any:
+        if not self._alive(key := _encode(name)):
+            return None
+        if not isinstance(value := self._data[key], kind):
+            raise ResponseError(_WRONGTYPE)
+        return value
+
+    def _set(self, name: _KEY, value: Any, ex: Optional[float] = None, keepttl: bool = False) -> None:
+        key = _encode(name)
+        self._data[key] = value
+        self._touch(key)
+        if ex is not None:
+            self._expires[key] = monotonic() + ex
+        elif not keepttl:
+            self._expires.pop(key, None)
+
+    def _pop(self, key: bytes) -> None:
+        self._data.pop(key, None)
+        self._expires.pop(key, None)
+        self._touch(key)
+
+    # connection
+
+    async def ping(self) -> bool:
+        return True
+
+    async def close(self) -> None:
+        pass
+
+    def pipeline(self, transaction: bool = True) -> MemoryPipeline:
+        return MemoryPipeline(self)
+
+    async def transaction(
+        self,
+        func: Callable[[MemoryPipeline], Any | Awaitable[Any]],
+        *watches: _KEY,
+        value_from_callable: bool = False,
+        watch_delay: Optional[float] = None,
+    ) -> Any:
+        async with self.pipeline() as pipe:
+            while True:
+                try:
+                    if watches:
+                        await pipe.watch(*watches)
+                    value = func(pipe)
+                    if isawaitable(value):
+                        value = await value
+                    results = await pipe.execute()
+                    return value if value_from_callable else results
+                except WatchError:
+                    if watch_delay:
+                        await sleep(watch_delay)
+
+    # pub/sub
+
+    def pubsub(self) -> MemoryPubSub:
+        return MemoryPubSub(self)
+
+    async def publish(self, channel: _KEY, message: _VALUE) -> int:
+        subscribers = self._subscribers.get(channel := _encode(channel), set())
+        for pubsub in subscribers:
+            pubsub._messages.put_nowait(
+                {"type": "message", "pattern": None, "channel": channel, "data": _encode(message)}
+            )
+        return len(subscribers)
+
+    # keys
+
+    async def exists(self, *names: _KEY) -> int:
+        return sum(self._alive(_encode(name)) for name in names)
+
+    async def delete(self, *names: _KEY) -> int:
+        deleted = 0
+        for name in names:
+            if self._alive(key := _encode(name)):
+                self._pop(key)
+                deleted += 1
+        return deleted
+
+    unlink = delete
+
+    async def expire(self, name: _KEY, time: float) -> bool:
+        if not self._alive(key := _encode(name)):
+            return False
+        self._expires[key] = monotonic() + time
+        self._touch(key)
+        return True
+
+    async def ttl(self, name: _KEY) -> int:
+        if not self._alive(key := _encode(name)):
+            return -2
+        if (expires := self._expires.get(key)) is None:
+            return -1
+        return round(expires - monotonic())
+
+    async def pttl(self, name: _KEY) -> int:
+        if not self._alive(key := _encode(name)):
+            return -2
+        if (expires := self._expires.get(key)) is None:
+            return -1
+        return round((expires - monotonic()) * 1000)
+
+    async def keys(self, pattern: _KEY = "*") -> list[bytes]:
+        regex = _glob(_encode(pattern).decode())
+        return [k for k in list(self._data) if self._alive(k) and regex.fullmatch(k.decode())]
+
+    async def scan(
+        self, cursor: int = 0, match: Optional[_KEY] = None, count: Optional[int] = None
+    ) -> tuple[int, list[bytes]]:
+        # like redis, keys which exist during the whole scan are returned even if others get deleted meanwhile
+        after = self._cursors.pop(cursor, None) if cursor else None
+        keys = sorted(k for k in await self.keys(match or "*") if after is None or k > after)
+        if count is None or count >= len(keys):
+            return 0, keys
+        self._cursors[cursor := next(self._cursor_ids)] = keys[count - 1]
+        return cursor, keys[:count]
+
+    async def scan_iter(self, match: Optional[_KEY] = None, count: Optional[int] = None) -> AsyncIterator[bytes]:
+        for key in await self.keys(match or "*"):
+            yield key
+
+    async def flushdb(self, asynchronous: bool = False) -> bool:
+        for key in self._data:
+            self._touch(key)
+        self._data.clear()
+        self._expires.clear()
+        return True
+
+    flushall = flushdb
+
+    # strings
+
+    async def get(self, name: _KEY) -> Optional[bytes]:
+        return self._get(name, bytes)
+
+    async def mget(self, keys: _KEY | Iterable[_KEY], *args: _KEY) -> list[Optional[bytes]]:
+        return [await self.get(name) for name in _list(keys, args)]
+
+    async def set(  # noqa: A003
+        self,
+        name: _KEY,
+        value: _VALUE,
+        ex: Optional[float] = None,
+        px: Optional[float] = None,
+        nx: bool = False,
+        xx: bool = False,
+        keepttl: bool = False,
+    ) -> Optional[bool]:
+        exists = self._alive(_encode(name))
+        if (nx and exists) or (xx and not exists):
+            return None
+        self._set(name, _encode(value), ex=px / 1000 if px is not None else ex, keepttl=keepttl)
+        return True
+
+    async def setex(self, name: _KEY, time: float, value: _VALUE) -> bool:
+        self._set(name, _encode(value), ex=time)
+        return True
+
+    async def incrby(self, name: _KEY, amount: int = 1) -> int:
+        value = int(self._get(name, bytes) or 0) + amount
+        self._set(name, _encode(value), keepttl=True)
+        return value
+
+    incr = incrby
+
+    # hashes
+
+    async def hset(
+        self,
+        name: _KEY,
+        key: Optional[_KEY] = None,
+        value: Optional[_VALUE] = None,
+        mapping: Optional[dict[_KEY, _VALUE]] = None,
+    ) -> int:
+        items = dict(mapping or {})
+        if key is not None:
+            items[key] = value
+        if (h := self._get(name, _Hash)) is None:
+            self._set(name, h := _Hash())
+        added = 0
+        for k, v in items.items():
+            added += (k := _encode(k)) not in h
+            h[k] = _encode(v)
+        self._touch(_encode(name))
+        return added
+
+    async def hget(self, name: _KEY, key: _KEY) -> Optional[bytes]:
+        return (self._get(name, _Hash) or {}).get(_encode(key))
+
+    async def hmget(self, name: _KEY, keys: _KEY | Iterable[_KEY], *args: _KEY) -> list[Optional[bytes]]:
+        h = self._get(name, _Hash) or {}
+        return [h.get(_encode(k)) for k in _list(keys, args)]
+
+    async def hgetall(self, name: _KEY) -> dict[bytes, bytes]:
+        return dict(self._get(name, _Hash) or {})
+
+    async def hdel(self, name: _KEY, *keys: _KEY) -> int:
+        if (h := self._get(name, _Hash)) is None:
+            return 0
+        deleted = sum(h.pop(_encode(k), None) is not None for k in keys)
+        if not h:
+            self._pop(_encode(name))
+        elif deleted:
+            self._touch(_encode(name))
+        return deleted
+
+    async def hlen(self, name: _KEY) -> int:
+        return len(self._get(name, _Hash) or {})
+
+    # sorted sets
+
+    async def zadd(self, name: _KEY, mapping: dict[_VALUE, float], nx: bool = False, xx: bool = False) -> int:
+        if (z := self._get(name, _ZSet)) is None:
+            self._set(name, z := _ZSet())
+        added = 0
+        for member, score in mapping.items():
+            exists = (member := _encode(member)) in z
+            if (nx and exists) or (xx and not exists):
+                continue
+            added += not exists
+            z[member] = float(score)
+            self._touch(_encode(name))
+        return added
+
+    async def zrem(self, name: _KEY, *values: _VALUE) -> int:
+        if (z := self._get(name, _ZSet)) is None:
+            return 0
+        removed = sum(z.pop(_encode(v), None) is not None for v in values)
+        if not z:
+            self._pop(_encode(name))
+        elif removed:
+            self._touch(_encode(name))
+        return removed
+
+    async def zscore(self, name: _KEY, value: _VALUE) -> Optional[float]:
+        return (self._get(name, _ZSet) or {}).get(_encode(value))
+
+    async def zcard(self, name: _KEY) -> int:
+        return len(self._get(name, _ZSet) or {})
+
+    async def zrangebyscore(
+        self,
+        name: _KEY,
+        min: float | str,  # noqa: A002
+        max: float | str,  # noqa: A002
+        start: Optional[int] = None,
+        num: Optional[int] = None,
+        withscores: bool = False,
+    ) -> list[bytes] | list[tuple[bytes, float]]:
+        low, high = _score(min), _score(max)
+        items = ((m, s) for m, s in (self._get(name, _ZSet) or {}).items() if low <= s <= high)
+        if start is not None and num is not None and num >= 0:
+            items = nsmallest(start + num, items, key=_by_score)[start:]
+        else:
+            items = sorted(items, key=_by_score)[start:]
+        return items if withscores else [m for m, _ in items]
+
+
+def _by_score(item: tuple[bytes, float]) -> tuple[float, bytes]:
+    return item[1], item[0]
+
+
+def _score(value: float | str) -> float:
+    match value:
+        case "-inf":
+            return float("-inf")
+        case "+inf" | "inf":
+            return float("inf")
+    return float(value)
+
+
+@lru_cache(maxsize=256)
+def _glob(pattern: str) -> re.Pattern[str]:
+    # redis' glob-style patterns: *, ?, [...] and \ to escape
+    out, i = [], 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern):
+            i += 1
+            out.append(re.escape(pattern[i]))
+        elif char == "*":
+            out.append(".*")
+        elif char == "?":
+            out.append(".")
+        elif char == "[" and (end := pattern.find("]", i + 1)) != -1:
+            out.append("[" + pattern[i + 1 : end].replace("\\", "\\\\") + "]")
+            i = end
+        else:
+            out.append(re.escape(char))
+        i += 1
+    return re.compile("".join(out), re.DOTALL)
@@ -0,0 +1,161 @@
+__all__ = (
+    "Histogram",
+    "MetricsSink",
+    "NullMetrics",
+    "MemoryMetrics",
+)
+
+from bisect import bisect_left
+from typing import NoReturn
+
+# seconds, from fast statements up to (way too) long lived sessions
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+)
+
+
+class Histogram:
+    """
+    Counts observations in fixed buckets.
+    """
+
+    buckets: tuple[float, ...]
+    counts: list[int]
+    count: int
+    sum: float  # noqa: A003
+    max: float  # noqa: A003
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one catches everything above the highest bucket
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> NoReturn:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates the quantile as the upper bound of the bucket it falls in.
+
+        Parameters
+        ----------
+        q: float
+            The quantile, between ``0`` and ``1``.
+
+        Returns
+        -------
+        float
+            The estimated value, ``max`` if it's above the highest bucket.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class MetricsSink:
+    """
+    Receives metrics, subclass it to forward them (e.g. to Prometheus or StatsD).
+
+    Notes
+    -----
+    The methods get called from within pool events, therefore they must be fast and mustn't raise.
+    """
+
+    def observe(self, name: str, value: float) -> NoReturn:
+        """
+        Records a value in the histogram ``name``.
+        """
+
+    def increment(self, name: str, amount: int = 1) -> NoReturn:
+        """
+        Increments the counter ``name``.
+        """
+
+    def gauge(self, name: str, value: float) -> NoReturn:
+        """
+        Sets the gauge ``name`` to the current value.
+        """
+
+
+class NullMetrics(MetricsSink):
+    """
+    Discards all metrics.
+    """
+
+
+class MemoryMetrics(MetricsSink):
+    """
+    Keeps all metrics in memory.
+    """
+
+    histograms: dict[str, Histogram]
+    counters: dict[str, int]
+    gauges: dict[str, float]
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+
+    def observe(self, name: str, value: float) -> NoReturn:
+        if (histogram := self.histograms.get(name)) is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(value)
+
+    def increment(self, name: str, amount: int = 1) -> NoReturn:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def gauge(self, name: str, value: float) -> NoReturn:
+        self.gauges[name] = value
+
+    def clear(self) -> NoReturn:
+        self.histograms.clear()
+        self.counters.clear()
+        self.gauges.clear()
+
+    def render(self) -> str:
+        """
+        Returns
+        -------
+        str
+            A human-readable summary of all metrics, durations are in milliseconds.
+        """
+        lines = []
+        for name, h in sorted(self.histograms.items()):
+            lines.append(
+                f"{name}: count={h.count} mean={h.mean * 1000:.2f} p50={h.quantile(0.5) * 1000:.2f} "
+                f"p95={h.quantile(0.95) * 1000:.2f} p99={h.quantile(0.99) * 1000:.2f} max={h.max * 1000:.2f}"
+            )
+        lines += [f"{name}: {value}" for name, value in sorted(self.counters.items())]
+        lines += [f"{name}: {value}" for name, value in sorted(self.gauges.items())]
+        return "\n".join(lines)
@@ -0,0 +1,225 @@
+__all__ = (
+    "MigrationModel",
+    "Migration",
+    "Migrator",
+    "discover_migrations",
+)
+
+
+from asyncio.tasks import sleep
+from datetime import datetime
+from pathlib import Path
+from sqlalchemy.engine.reflection import Inspector
+from sqlalchemy.ext.asyncio.engine import AsyncEngine
+from sqlalchemy.future import select as sa_select
+from sqlalchemy.inspection import inspect
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.ddl import CreateColumn
+from sqlalchemy.sql.expression import text, update as sa_update
+from sqlalchemy.sql.schema import Column, Table
+from sqlalchemy.sql.sqltypes import Integer, String
+from typing import Any, Callable, Iterable, NamedTuple, NoReturn, Optional, TYPE_CHECKING, TypeVar
+from .database import Base, UTCDatetime
+from ._utils_essentials import get_logger
+
+if TYPE_CHECKING:
+    # only needed for type hinting
+    from .misc import PrimitiveExtension
+
+
+T = TypeVar("T")
+
+logger = get_logger(__name__)
+
+
+class MigrationModel(Base):
+    __tablename__ = "migration"
+
+    extension: str | Column = Column(String(64), primary_key=True, nullable=False)
+    version: int | Column = Column(Integer, primary_key=True, autoincrement=False, nullable=False)
+    name: str | Column = Column(String(128), nullable=False)
+    applied: datetime | Column = Column(UTCDatetime, nullable=False)
+
+
+class Migration(NamedTuple):
+    extension: str
+    version: int
+    name: str
+    path: Path
+
+
+def discover_migrations(extensions: Iterable["PrimitiveExtension"]) -> list[Migration]:
+    """
+    Finds the migrations of all extensions.
+
+    Notes
+    -----
+    Migrations are located in ``<extension>/migrations/`` and are named ``<version>_<name>.py``
+    (e.g. ``0001_indexes.py``). Each one has to define ``async def upgrade(migrator: Migrator) -> NoReturn``.
+
+    Parameters
+    ----------
+    extensions: Iterable[PrimitiveExtension]
+        The extensions to search.
+
+    Returns
+    -------
+    list[Migration]
+        The migrations ordered by extension and version.
+    """
+    migrations = []
+    for ext in extensions:
+        if not ext.has_migrations:
+            continue
+        for path in ext.path.joinpath("migrations").glob("*.py"):
+            version, _, name = path.stem.partition("_")
+            if version.isdigit():
+                migrations.append(Migration(extension=ext.name, version=int(version), name=name, path=path))
+    return sorted(migrations, key=lambda m: (m.extension, m.version))
+
+
+class Migrator:
+    """
+    Schema operations for migrations, which avoid long table locks where the dialect allows it.
+    """
+
+    engine: AsyncEngine
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+
+    @property
+    def dialect(self) -> str:
+        return self.engine.dialect.name
+
+    def _quote(self, identifier: str) -> str:
+        return self.engine.dialect.identifier_preparer.quote(identifier)
+
+    async def _inspect(self, func: Callable[[Inspector], T]) -> T:
+        async with self.engine.connect() as conn:
+            return await conn.run_sync(lambda sync_conn: func(inspect(sync_conn)))
+
+    async def execute(self, statement: Executable | str) -> NoReturn:
+        """
+        Executes a statement outside a transaction.
+        """
+        if isinstance(statement, str):
+            statement = text(statement)
+        async with self.engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(statement)
+
+    async def has_index(self, table: str, name: str) -> bool:
+        return any(index["name"] == name for index in await self._inspect(lambda i: i.get_indexes(table)))
+
+    async def has_column(self, table: str, name: str) -> bool:
+        return any(column["name"] == name for column in await self._inspect(lambda i: i.get_columns(table)))
+
+    async def create_index(self, table: str, name: str, *columns: str, unique: bool = False) -> NoReturn:
+        """
+        Creates an index (if it doesn't exist) while the table stays readable and writable.
+        """
+        if await self.has_index(table, name):
+            logger.debug(f"Index {name!r} on {table!r} already exists")
+            return
+
+        cols = ", ".join(self._quote(c) for c in columns)
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        match self.dialect:
+            case "mysql" | "mariadb":
+                ddl = f"ALTER TABLE {self._quote(table)} ADD {kind} {self._quote(name)} ({cols}), "
+                ddl += "ALGORITHM=INPLACE, LOCK=NONE"
+            case "postgresql":
+                ddl = f"CREATE {kind} CONCURRENTLY {self._quote(name)} ON {self._quote(table)} ({cols})"
+            case _:
+                ddl = f"CREATE {kind} {self._quote(name)} ON {self._quote(table)} ({cols})"
+
+        logger.info(f"Creating index {name!r} on {table!r}")
+        await self.execute(ddl)
+
+    async def drop_index(self, table: str, name: str) -> NoReturn:
+        if not await self.has_index(table, name):
+            return
+
+        match self.dialect:
+            case "mysql" | "mariadb":
+                ddl = f"ALTER TABLE {self._quote(table)} DROP INDEX {self._quote(name)}, ALGORITHM=INPLACE, LOCK=NONE"
+            case "postgresql":
+                ddl = f"DROP INDEX CONCURRENTLY {self._quote(name)}"
+            case _:
+                ddl = f"DROP INDEX {self._quote(name)}"
+
+        logger.info(f"Dropping index {name!r} on {table!r}")
+        await self.execute(ddl)
+
+    async def add_column(self, table: str, column: Column) -> NoReturn:
+        """
+        Adds a column (if it doesn't exist) while the table stays readable and writable.
+
+        Notes
+        -----
+        Add big tables' columns as nullable and fill them with ``backfill`` afterwards.
+        """
+        if await self.has_column(table, column.name):
+            logger.debug(f"Column {column.name!r} on {table!r} already exists")
+            return
+
+        ddl = f"ALTER TABLE {self._quote(table)} ADD COLUMN {CreateColumn(column).compile(dialect=self.engine.dialect)}"
+        if self.dialect in {"mysql", "mariadb"}:
+            ddl += ", ALGORITHM=INPLACE, LOCK=NONE"
+
+        logger.info(f"Adding column {column.name!r} to {table!r}")
+        await self.execute(ddl)
+
+    async def backfill(
+        self,
+        table: str,
+        values: dict[str, Any],
+        where: Optional[Any] = None,
+        batch_size: int = 1000,
+        pause: float = 0.0,
+    ) -> int:
+        """
+        Updates rows in batches by their primary key, so only a few rows are locked at a time.
+
+        Parameters
+        ----------
+        table: str
+            The name of the table, has to be declared by a ``Base``-model.
+        values: dict[str, Any]
+            The new values of the columns.
+        where: Any, optional
+            Only updates rows matching this clause.
+        batch_size: int
+            The amount of rows to update per transaction.
+        pause: float
+            The amount of seconds to wait between two batches.
+
+        Returns
+        -------
+        int
+            The amount of updated rows.
+        """
+        tbl: Table = Base.metadata.tables[table]
+        (pk,) = tbl.primary_key.columns
+
+        total = 0
+        last: Any = None
+        while True:
+            query = sa_select(pk).order_by(pk).limit(batch_size)
+            if where is not None:
+                query = query.where(where)
+            if last is not None:
+                query = query.where(pk > last)
+
+            async with self.engine.begin() as conn:
+                if not (ids := (await conn.execute(query)).scalars().all()):
+                    break
+                await conn.execute(sa_update(tbl).where(pk.in_(ids)).values(**values))
+
+            total += len(ids)
+            last = ids[-1]
+            logger.debug(f"Backfilled {total} rows of {table!r}")
+            await sleep(pause)
+
+        return total
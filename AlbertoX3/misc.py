@@ -14,7 +14,7 @@ class FormatStr(str):
     __call__: Callable[..., str] = str.format
 
 
-_EXTENSION_FEATURES = Literal["colors", "db", "ext", "permissions", "settings", "stats"]
+_EXTENSION_FEATURES = Literal["colors", "db", "ext", "permissions", "settings", "stats", "migrations"]
 
 # only public because this might be of interest and not in .constants since it's required in here
 EXTENSION_FEATURES: tuple[_EXTENSION_FEATURES] = _EXTENSION_FEATURES.__args__  # type: ignore
@@ -80,6 +80,13 @@ class PrimitiveExtension:
         """
         return self._has(5)
 
+    @property
+    def has_migrations(self) -> bool:
+        """
+        Whether it features a migrations-folder or not.
+        """
+        return self._has(6)
+
     def _has(self, i: int) -> bool:
         return (self.features & (1 << i)) == (1 << i)
 
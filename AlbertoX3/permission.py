@@ -1,9 +1,11 @@
 __all__ = (
     "permission_override",
     "PermissionModel",
+    "permission_cache",
     "BasePermission",
     "BasePermissionLevel",
     "PermissionLevel",
+    "MemberLevelCache",
     "check_permission_level",
 )
 
@@ -12,18 +14,26 @@ import sys
 from aenum import Enum
 from collections import namedtuple
 from contextvars import ContextVar
-from naff.models.discord.user import BaseUser
+from functools import partial, reduce
+from naff.models.discord.enums import Permissions
+from naff.models.discord.user import BaseUser, Member
 from naff.models.naff.command import check
 from naff.models.naff.context import Context
 from sqlalchemy.sql.schema import Column
 from sqlalchemy.sql.sqltypes import Integer, String
-from typing import Awaitable, Callable, NoReturn
-from .database import Base, db, redis
-from .environment import CACHE_TTL
+from time import monotonic
+from typing import Awaitable, Callable, Iterable, NoReturn, Optional
+from .aio import DataLoader
+from .cache import CacheNamespace, CachePolicy, LRUCache
+from .database import Base, db, db_wrapper, invalidation_bus, redis, redis_breaker, select
 from .errors import UnrecognisedPermissionLevelError
+from .settings import RoleSettings, settings_cache
 
 
 permission_override: ContextVar["BasePermissionLevel"] = ContextVar("permission_override")
+permission_cache: CacheNamespace = CacheNamespace(
+    "permissions", redis, CachePolicy(loads=int), bus=invalidation_bus, breaker=redis_breaker
+)
 
 
 class PermissionModel(Base):
@@ -38,24 +48,72 @@ class PermissionModel(Base):
 
     @staticmethod
     async def get(permission: str, default: int) -> int:
-        if (value := await redis.get(rkey := f"permissions:{permission}")) is not None:
-            return int(value)
+        return await permission_cache.get_or_load(permission, partial(_loader.load, (permission, default)))
+
+    @staticmethod
+    async def _load_many(keys: list[tuple[str, int]]) -> list[int]:
+        levels = await PermissionModel._fetch(dict(keys))
+        return [levels[permission] for permission, _ in keys]
+
+    @staticmethod
+    async def _fetch(defaults: dict[str, int]) -> dict[str, int]:
+        """
+        Reads the levels from the database, missing permissions are inserted with their default level.
+        """
+        query = select(PermissionModel).where(PermissionModel.permission.in_(defaults))
+        loaded = {row.permission: row.level for row in await db.all(query)}
+        if absent := {p: level for p, level in defaults.items() if p not in loaded}:
+            # a concurrent lookup may have inserted some of them already
+            await PermissionModel.seed(absent)
+            query = select(PermissionModel).where(PermissionModel.permission.in_(absent))
+            loaded |= {row.permission: row.level for row in await db.all(query)}
+        return loaded
 
-        if (row := await db.get(PermissionModel, permission=permission)) is None:
-            row = await PermissionModel.create(permission=permission, level=default)
+    @staticmethod
+    async def get_many(defaults: dict[str, int]) -> dict[str, int]:
+        """
+        Like ``get``, but for multiple permissions with a constant amount of round trips.
+
+        Parameters
+        ----------
+        defaults: dict[str, int]
+            The default level by permission.
+
+        Returns
+        -------
+        dict[str, int]
+            The level by permission.
+        """
+        levels = {p: v for p, v in (await permission_cache.get_many(defaults)).items() if v is not None}
+        if not (missing := [p for p in defaults if p not in levels]):
+            return levels
+
+        loaded = await PermissionModel._fetch({p: defaults[p] for p in missing})
+        await permission_cache.set_many(loaded, publish=False)
+        return levels | loaded
 
-        await redis.setex(rkey, CACHE_TTL, row.level)
-        return row.level
+    @staticmethod
+    async def set(permission: str, level: int) -> NoReturn:  # noqa A003
+        await db.upsert(PermissionModel, {"permission": permission, "level": level})
+        await permission_cache.set(permission, level)
 
     @staticmethod
-    async def set(permission: str, level: int) -> "PermissionModel":  # noqa A003
-        await redis.setex(f"permissions:{permission}", CACHE_TTL, level)
+    async def seed(defaults: dict[str, int]) -> NoReturn:
+        """
+        Inserts the default levels of all missing permissions.
+
+        Parameters
+        ----------
+        defaults: dict[str, int]
+            The default level by permission.
+        """
+        await db.upsert_many(
+            PermissionModel, [{"permission": p, "level": level} for p, level in defaults.items()], update=()
+        )
 
-        if (row := await db.get(PermissionModel, permission=permission)) is None:
-            row = await PermissionModel.create(permission=permission, level=level)
 
-        row.level = level
-        return row
+# the cache misses of one iteration of the event loop are loaded with one query (in a session of their own)
+_loader: DataLoader[tuple[str, int], int] = DataLoader(db_wrapper(PermissionModel._load_many))
 
 
 class BasePermission(Enum):
@@ -81,10 +139,32 @@ class BasePermission(Enum):
         from .constants import Config
 
         value: int = await PermissionModel.get(self.fullname, self._default_level.level)
-        for level in Config.PERMISSION_LEVELS:  # type: ignore
-            if level.level == value:
-                return level
-        raise UnrecognisedPermissionLevelError(level=value)
+        return Config.PERMISSION_LEVELS.from_level(value)  # type: ignore
+
+    @staticmethod
+    async def resolve_many(permissions: list["BasePermission"]) -> list["BasePermissionLevel"]:
+        """
+        Resolves multiple permissions at once (see ``PermissionModel.get_many``).
+
+        Parameters
+        ----------
+        permissions: list[BasePermission]
+            The permissions to resolve.
+
+        Returns
+        -------
+        list[BasePermissionLevel]
+            The levels in the same order as the permissions.
+
+        Raises
+        ------
+        UnrecognisedPermissionLevelError
+            If a stored level doesn't exist.
+        """
+        from .constants import Config
+
+        values = await PermissionModel.get_many({p.fullname: p._default_level.level for p in permissions})  # noqa
+        return [Config.PERMISSION_LEVELS.from_level(values[p.fullname]) for p in permissions]  # type: ignore
 
     async def set(self, level: "BasePermissionLevel") -> NoReturn:  # noqa A003
         await PermissionModel.set(self.fullname, level.level)
@@ -132,6 +212,19 @@ class BasePermissionLevel(Enum):
     async def _get_permission_level(cls, user: BaseUser) -> "BasePermissionLevel":
         raise NotImplementedError
 
+    @classmethod
+    def from_level(cls, level: int) -> "BasePermissionLevel":
+        """
+        Raises
+        ------
+        UnrecognisedPermissionLevelError
+            If no permission level has this level.
+        """
+        # the map is set by the config, the levels are unique
+        if (out := cls._by_level.get(level)) is None:
+            raise UnrecognisedPermissionLevelError(level=level)
+        return out
+
     async def check_permissions(self, user: BaseUser) -> bool:
         level: BasePermissionLevel = await self.get_permission_level(user)
         return level.level >= self.level
@@ -145,6 +238,94 @@ class BasePermissionLevel(Enum):
         return max(cls, key=lambda x: x.level)
 
 
+class MemberLevelCache:
+    """
+    Resolves the permission levels of members with dict lookups.
+
+    Notes
+    -----
+    The role settings are read into a map from role id to the highest level the role grants.
+    Resolved levels are cached by guild and role fingerprint (the set of roles and the guild permissions
+    the levels check), therefore all members with the same roles share one entry.
+
+    The role map is re-read once the settings cache changed (e.g. a role setting was set here or evicted
+    by the invalidation bus) or its ``local_ttl`` passed, the cached levels are dropped if the map changed.
+    """
+
+    levels: list[PermissionLevel]  # highest first
+    members: LRUCache[tuple[int, frozenset[int], int], int]
+    _flags: list[tuple[int, Permissions]]
+    _mask: Permissions
+    _role_levels: dict[int, int]
+    _generation: Optional[int]
+    _expires: float
+
+    def __init__(self, levels: Iterable[PermissionLevel], maxsize: int = 4096):
+        """
+        Parameters
+        ----------
+        levels: Iterable[PermissionLevel]
+            The configured permission levels.
+        maxsize: int
+            The maximum amount of cached fingerprints.
+        """
+        self.levels = sorted(levels, key=lambda pl: pl.level, reverse=True)
+        self.members = LRUCache(maxsize=maxsize, ttl=settings_cache.policy.local_ttl)
+        self._flags = [
+            (pl.level, reduce(lambda a, b: a | b, (Permissions[p.upper()] for p in pl.guild_permissions)))
+            for pl in self.levels
+            if pl.guild_permissions
+        ]
+        self._mask = reduce(lambda a, b: a | b, (flags for _, flags in self._flags), Permissions.NONE)
+        self._role_levels = {}
+        self._generation = None
+        self._expires = 0.0
+
+    async def resolve(self, member: Member) -> int:
+        """
+        Returns
+        -------
+        int
+            The highest level whose roles or guild permissions the member has, ``0`` (public) if none.
+        """
+        await self._refresh()
+        roles = frozenset(role.id for role in member.roles)
+        permissions = member.guild_permissions & self._mask if self._flags else Permissions.NONE
+        key = (member.guild.id, roles, int(permissions))
+        if (level := self.members.get(key)) is None:
+            level = max(
+                (
+                    *(self._role_levels.get(role, 0) for role in roles),
+                    *(pl for pl, flags in self._flags if permissions & flags),
+                ),
+                default=0,
+            )
+            self.members.set(key, level)
+        return level
+
+    def clear(self) -> NoReturn:
+        self._generation = None
+        self.members.clear()
+
+    async def _refresh(self) -> NoReturn:
+        if self._generation == settings_cache.generation and monotonic() < self._expires:
+            return
+
+        generation = settings_cache.generation
+        role_ids = await RoleSettings.get_many({name for pl in self.levels for name in pl.roles})
+        role_levels = {}
+        for pl in reversed(self.levels):  # higher levels overwrite lower ones
+            for name in pl.roles:
+                if (role_id := role_ids[name]) >= 0:
+                    role_levels[role_id] = pl.level
+
+        if role_levels != self._role_levels:
+            self._role_levels = role_levels
+            self.members.clear()
+        self._generation = generation
+        self._expires = monotonic() + settings_cache.policy.local_ttl
+
+
 def check_permission_level(level: BasePermission | BasePermissionLevel) -> Callable[[Context], Awaitable[bool]]:
     async def inner(ctx: Context) -> bool:
         user: BaseUser = ctx.author
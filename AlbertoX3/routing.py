@@ -0,0 +1,34 @@
+__all__ = ("RoutingSession",)
+
+
+from sqlalchemy.orm.session import Session
+from sqlalchemy.sql.selectable import Select
+from typing import Any
+
+
+class RoutingSession(Session):
+    """
+    A session which sends statements that only read to a replica.
+
+    Notes
+    -----
+    Plain SELECTs (without FOR UPDATE) go to ``info["replica"]``, everything else goes to the primary.
+    Once anything went to the primary the session sticks to it, so it reads its own writes.
+    Statements can be forced onto the primary with ``.execution_options(primary=True)``.
+    """
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kwargs: Any) -> Any:
+        primary = super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        if (replica := self.info.get("replica")) is None or self.info.get("pinned", False):
+            return primary
+        if self._reads_only(clause):
+            return replica
+
+        self.info["pinned"] = True
+        return primary
+
+    @staticmethod
+    def _reads_only(clause: Any) -> bool:
+        if not isinstance(clause, Select) or clause._for_update_arg is not None:  # noqa
+            return False
+        return not clause.get_execution_options().get("primary", False)
@@ -1,5 +1,6 @@
 __all__ = (
     "SettingsModel",
+    "settings_cache",
     "Settings",
     "RoleSettings",
 )
@@ -7,15 +8,22 @@ __all__ = (
 
 import sys
 from aenum import NoAliasEnum
+from contextlib import AsyncExitStack
+from functools import partial
 from sqlalchemy.sql.schema import Column
 from sqlalchemy.sql.sqltypes import String, Text
-from .aio import LockDeco
-from .database import Base, db, redis
-from .environment import CACHE_TTL
+from typing import Iterable, NoReturn
+from .aio import DataLoader, KeyedLock
+from .cache import CacheNamespace
+from .database import Base, db, db_wrapper, invalidation_bus, redis, redis_breaker, select
 
 
 _VALUE = str | int | float | bool
 
+settings_cache: CacheNamespace = CacheNamespace("settings", redis, bus=invalidation_bus, breaker=redis_breaker)
+# loads and writes of one key are serialized, other keys aren't blocked by them
+_locks: KeyedLock = KeyedLock()
+
 
 class SettingsModel(Base):
     __tablename__ = "settings"
@@ -24,32 +32,82 @@ class SettingsModel(Base):
     value: str | Column = Column(Text(256))
 
     @staticmethod
-    async def _create(key: str, value: _VALUE) -> "SettingsModel":
-        return await db.add(SettingsModel(key=key, value=str(int(value) if isinstance(value, bool) else value)))
+    async def get(dtype: type[_VALUE], key: str, default: _VALUE) -> _VALUE:
+        out = await settings_cache.get_or_load(key, partial(_loader.load, (key, default)))
+        return dtype(int(out) if dtype is bool else out)
 
     @staticmethod
-    @LockDeco
-    async def get(dtype: type[_VALUE], key: str, default: _VALUE) -> _VALUE:
-        if (out := await redis.get(rkey := f"settings:{key}")) is None:
-            if (row := await db.get(SettingsModel, key=key)) is None:
-                row = await SettingsModel._create(key, default)
-            out = row.value
-            await redis.setex(rkey, CACHE_TTL, out)
+    async def _load_many(keys: list[tuple[str, _VALUE]]) -> list[str]:
+        defaults = dict(keys)
+        async with AsyncExitStack() as stack:
+            # sorted, so two batches can't deadlock
+            for key in sorted(defaults):
+                await stack.enter_async_context(_locks(key))
+            values = await SettingsModel._fetch(defaults)
+        return [values[key] for key, _ in keys]
 
-        return dtype(int(out) if dtype is bool else out)
+    @staticmethod
+    async def _fetch(defaults: dict[str, _VALUE]) -> dict[str, str]:
+        """
+        Reads the values from the database, missing settings are inserted with their default value.
+        """
+        query = select(SettingsModel).where(SettingsModel.key.in_(defaults))
+        loaded = {row.key: row.value for row in await db.all(query)}
+        if absent := {k: v for k, v in defaults.items() if k not in loaded}:
+            # a concurrent lookup may have inserted some of them already
+            await SettingsModel.seed(absent)
+            query = select(SettingsModel).where(SettingsModel.key.in_(absent))
+            loaded |= {row.key: row.value for row in await db.all(query)}
+        return loaded
+
+    @staticmethod
+    async def get_many(defaults: dict[str, _VALUE]) -> dict[str, str]:
+        """
+        Like ``get``, but for multiple keys with a constant amount of round trips.
+
+        Parameters
+        ----------
+        defaults: dict[str, _VALUE]
+            The default value by key.
+
+        Returns
+        -------
+        dict[str, str]
+            The (not yet converted) value by key.
+        """
+        values = {k: v for k, v in (await settings_cache.get_many(defaults)).items() if v is not None}
+        if not (missing := [k for k in defaults if k not in values]):
+            return values
+
+        loaded = await SettingsModel._fetch({k: defaults[k] for k in missing})
+        await settings_cache.set_many(loaded, publish=False)
+        return values | loaded
+
+    @staticmethod
+    async def set(dtype: type[_VALUE], key: str, value: _VALUE) -> NoReturn:  # noqa A003
+        async with _locks(key):
+            await db.upsert(SettingsModel, {"key": key, "value": _dump(value)})
+            await settings_cache.set(key, _dump(value))
 
     @staticmethod
-    @LockDeco
-    async def set(dtype: type[_VALUE], key: str, value: _VALUE) -> "SettingsModel":  # noqa A003
-        rkey = f"settings:{key}"
-        if (row := await db.get(SettingsModel, key=key)) is None:
-            row = await SettingsModel._create(key, value)
-            await redis.setex(rkey, CACHE_TTL, row.value)
-            return row
+    async def seed(defaults: dict[str, _VALUE]) -> NoReturn:
+        """
+        Inserts the default values of all missing settings.
+
+        Parameters
+        ----------
+        defaults: dict[str, _VALUE]
+            The default value by key.
+        """
+        await db.upsert_many(SettingsModel, [{"key": k, "value": _dump(v)} for k, v in defaults.items()], update=())
+
+
+# the cache misses of one iteration of the event loop are loaded with one query (in a session of their own)
+_loader: DataLoader[tuple[str, _VALUE], str] = DataLoader(db_wrapper(SettingsModel._load_many))
+
 
-        row.value = str(int(value) if dtype is bool else value)
-        await redis.setex(rkey, CACHE_TTL, row.value)
-        return row
+def _dump(value: _VALUE) -> str:
+    return str(int(value) if isinstance(value, bool) else value)
 
 
 class Settings(NoAliasEnum):
@@ -81,11 +139,23 @@ class Settings(NoAliasEnum):
 
 
 class RoleSettings:
+    @staticmethod
+    def key(name: str) -> str:
+        return f"role:{name}"
+
     @staticmethod
     async def get(name: str) -> int:
-        return await SettingsModel.get(int, f"role:{name}", -1)
+        return await SettingsModel.get(int, RoleSettings.key(name), -1)
+
+    @staticmethod
+    async def get_many(names: Iterable[str]) -> dict[str, int]:
+        """
+        Gets the role ids of multiple role settings (see ``SettingsModel.get_many``), ``-1`` if unset.
+        """
+        values = await SettingsModel.get_many({RoleSettings.key(name): -1 for name in names})
+        return {key.removeprefix("role:"): int(value) for key, value in values.items()}
 
     @staticmethod
     async def set(name: str, role_id: int) -> int:  # noqa A003
-        await SettingsModel.set(int, f"role:{name}", role_id)
+        await SettingsModel.set(int, RoleSettings.key(name), role_id)
         return role_id
@@ -0,0 +1,183 @@
+__all__ = (
+    "StatementStats",
+    "IndexSuggestion",
+    "StatementRecorder",
+)
+
+
+import re
+from sqlalchemy.engine.base import Connection
+from sqlalchemy.engine.interfaces import Dialect
+from sqlalchemy.event import listen
+from sqlalchemy.ext.asyncio.engine import AsyncEngine
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, ClauseElement, UnaryExpression
+from sqlalchemy.sql.schema import Column, Table
+from sqlalchemy.sql.visitors import iterate
+from time import perf_counter
+from typing import Any, NamedTuple, NoReturn, Optional
+
+
+class StatementStats:
+    fingerprint: str
+    count: int
+    total: float
+    max: float  # noqa A003
+    # {table: columns} which would support the statement as an index
+    candidates: dict[str, tuple[str, ...]]
+
+    def __init__(self, fingerprint: str, candidates: dict[str, tuple[str, ...]]):
+        self.fingerprint = fingerprint
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.candidates = candidates
+
+    def add(self, duration: float) -> NoReturn:
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+
+
+class IndexSuggestion(NamedTuple):
+    table: str
+    columns: tuple[str, ...]
+    statements: int  # amount of executed statements which would use the index
+    total: float  # time in seconds spent in these statements
+    ddl: str
+
+
+_FINGERPRINT_REGEXES: list[tuple[re.Pattern[str], str]] = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),  # string literals
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),  # numeric literals
+    (re.compile(r"%\(\w+\)s|%s|:\w+|\?"), "?"),  # bound parameters of any paramstyle
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?+)"),  # expanded IN-lists
+    (re.compile(r"\s+"), " "),
+]
+
+
+_EQUALITY_OPERATORS = {operators.eq, operators.in_op, operators.is_}
+
+
+def _fingerprint(statement: str) -> str:
+    """
+    Normalizes a SQL statement, so statements which only differ by their values share one fingerprint.
+    """
+    for regex, replacement in _FINGERPRINT_REGEXES:
+        statement = regex.sub(replacement, statement)
+    return statement.strip()
+
+
+def _column_of(element: Any) -> Optional[Column]:
+    if isinstance(element, UnaryExpression):  # ORDER BY x DESC
+        element = element.element
+    if isinstance(element, Column) and isinstance(element.table, Table):
+        return element
+    return None
+
+
+def _index_candidates(statement: ClauseElement) -> dict[str, tuple[str, ...]]:
+    # an index supports the statement if it starts with all columns compared by equality,
+    # followed by (at most) one column which is compared by range or used for ordering
+    equality: dict[str, list[str]] = {}
+    others: dict[str, list[str]] = {}
+
+    if (where := getattr(statement, "whereclause", None)) is not None:
+        for element in iterate(where):
+            if not isinstance(element, BinaryExpression) or (column := _column_of(element.left)) is None:
+                continue
+            target = equality if element.operator in _EQUALITY_OPERATORS else others
+            if column.name not in (columns := target.setdefault(column.table.name, [])):
+                columns.append(column.name)
+
+    for element in getattr(statement, "_order_by_clauses", ()):
+        if (column := _column_of(element)) is not None:
+            if column.name not in (columns := others.setdefault(column.table.name, [])):
+                columns.append(column.name)
+
+    candidates = {}
+    for table in equality.keys() | others.keys():
+        columns = equality.get(table, [])
+        columns += [c for c in others.get(table, []) if c not in columns][:1]
+        candidates[table] = tuple(columns)
+    return candidates
+
+
+class StatementRecorder:
+    """
+    Records normalized statements with their count and timings through engine events.
+    """
+
+    statements: dict[str, StatementStats]
+
+    def __init__(self):
+        self.statements = {}
+
+    def attach(self, engine: AsyncEngine) -> NoReturn:
+        listen(engine.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        listen(engine.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def clear(self) -> NoReturn:
+        self.statements.clear()
+
+    def _before_cursor_execute(self, conn: Connection, *_: Any) -> NoReturn:
+        conn.info.setdefault("statement_start", []).append(perf_counter())
+
+    def _after_cursor_execute(
+        self, conn: Connection, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> NoReturn:
+        duration = perf_counter() - conn.info["statement_start"].pop()
+
+        if (stats := self.statements.get(key := _fingerprint(statement))) is None:
+            compiled = getattr(getattr(context, "compiled", None), "statement", None)
+            candidates = _index_candidates(compiled) if compiled is not None else {}
+            stats = self.statements[key] = StatementStats(key, candidates)
+        stats.add(duration)
+
+    def suggest_indexes(self, dialect: Dialect) -> list[IndexSuggestion]:
+        """
+        Suggests indexes for ``Base``-tables which would support the recorded statements.
+
+        Parameters
+        ----------
+        dialect: Dialect
+            The dialect to create the DDL for.
+
+        Returns
+        -------
+        list[IndexSuggestion]
+            The suggested indexes, the most time-consuming first.
+        """
+        from .database import Base
+
+        tables: dict[str, Table] = {cls.__table__.name: cls.__table__ for cls in Base.__subclasses__()}
+        quote = dialect.identifier_preparer.quote
+
+        suggestions: dict[tuple[str, tuple[str, ...]], list[StatementStats]] = {}
+        for stats in self.statements.values():
+            for name, columns in stats.candidates.items():
+                if columns and (table := tables.get(name)) is not None and not _is_indexed(table, columns):
+                    suggestions.setdefault((name, columns), []).append(stats)
+
+        out = []
+        for (table, columns), statements in suggestions.items():
+            index = f"ix_{table}_{'_'.join(columns)}"
+            ddl = f"CREATE INDEX {quote(index)} ON {quote(table)} ({', '.join(quote(c) for c in columns)})"
+            out.append(
+                IndexSuggestion(
+                    table=table,
+                    columns=columns,
+                    statements=sum(s.count for s in statements),
+                    total=sum(s.total for s in statements),
+                    ddl=ddl,
+                )
+            )
+        return sorted(out, key=lambda s: s.total, reverse=True)
+
+
+def _is_indexed(table: Table, columns: tuple[str, ...]) -> bool:
+    indexed: list[tuple[str, ...]] = [tuple(c.name for c in table.primary_key.columns)]
+    indexed += [tuple(c.name for c in index.columns) for index in table.indexes]
+    indexed += [(c.name,) for c in table.columns if c.unique]
+    # an index can be used if its leading columns match
+    return any(set(existing[: len(columns)]) == set(columns) for existing in indexed)
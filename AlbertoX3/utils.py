@@ -7,6 +7,8 @@ __all__ = (
     "get_extensions",
     "get_subclasses_in_extensions",
     "get_permissions",
+    "seed_defaults",
+    "warm_up_caches",
     "get_language",
     "get_member",
     "get_user",
@@ -23,11 +25,12 @@ from naff.models.discord.user import Member, User
 from naff.models.naff.context import Context
 from pathlib import Path
 from pprint import pformat
-from typing import Optional, TypeVar
+from typing import NoReturn, Optional, TypeVar
 from .constants import Config, LIB_PATH, MISSING, StyleConfig
 from .errors import DeveloperArgumentError
 from .misc import EXTENSION_FEATURES, PrimitiveExtension
-from .permission import BasePermission
+from .permission import BasePermission, PermissionModel
+from .settings import RoleSettings, Settings, SettingsModel
 from ._utils_essentials import get_bool, get_logger
 
 
@@ -170,6 +173,8 @@ def get_extensions(folder: Absent[Path] = MISSING) -> set[PrimitiveExtension]:
             continue
 
         features = {f for f in py_files if f in EXTENSION_FEATURES}
+        if ext.joinpath("migrations").is_dir():
+            features.add("migrations")
         extensions.add(PrimitiveExtension(name=ext.name, package=f"{folder.name}.{ext.name}", path=ext, has=features))
 
     return extensions
@@ -191,6 +196,39 @@ def get_permissions() -> list[BasePermission]:
     return permissions
 
 
+async def seed_defaults() -> NoReturn:
+    """
+    Stores the defaults of all permissions and settings which aren't stored yet.
+    """
+    await PermissionModel.seed({p.fullname: p._default_level.level for p in get_permissions()})  # noqa
+    await SettingsModel.seed({s.fullname: s.default for cls in Settings.__subclasses__() for s in cls})
+
+
+async def warm_up_caches(extension: Optional[str] = None) -> int:
+    """
+    Loads all permissions, settings and role mappings into the caches (redis and the local ones).
+
+    Parameters
+    ----------
+    extension: str, optional
+        Only loads the permissions and settings of this extension.
+
+    Returns
+    -------
+    int
+        The amount of loaded keys.
+    """
+    permissions = {p.fullname: p._default_level.level for p in get_permissions()}  # noqa
+    settings = {s.fullname: s.default for cls in Settings.__subclasses__() for s in cls}
+    if extension is None:
+        settings |= {RoleSettings.key(name): -1 for name in Config.ROLES or {}}
+    else:
+        permissions = {k: v for k, v in permissions.items() if k.startswith(f"{extension}.")}
+        settings = {k: v for k, v in settings.items() if k.startswith(f"{extension}.")}
+
+    return len(await PermissionModel.get_many(permissions)) + len(await SettingsModel.get_many(settings))
+
+
 async def get_language(
     *, guild: Absent[Guild | Snowflake_Type] = MISSING, user: Absent[User | Member | Snowflake_Type] = MISSING
 ) -> Optional[str]:
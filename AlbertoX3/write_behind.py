@@ -0,0 +1,200 @@
+__all__ = ("WriteBehindBuffer",)
+
+
+from asyncio.events import get_running_loop
+from asyncio.exceptions import CancelledError, TimeoutError
+from asyncio.locks import Lock
+from asyncio.queues import Queue
+from asyncio.tasks import Task, create_task, shield, sleep, wait_for
+from sqlalchemy.exc import DBAPIError, DisconnectionError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio.engine import AsyncEngine
+from sqlalchemy.sql.expression import insert as sa_insert
+from sqlalchemy.sql.schema import Table
+from typing import Any, NoReturn, Optional
+from ._utils_essentials import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    Collects rows from all concurrent interactions and writes them as multi-row INSERTs.
+
+    A flush is triggered as soon as ``max_rows`` rows are pending or ``interval`` seconds
+    passed since the first pending row, whichever happens first.
+
+    If the database can't be reached the rows are kept (up to ``max_queue``) and retried with the next flush.
+    If a batch is rejected (e.g. by a constraint) its rows are inserted one by one, only the bad ones get dropped.
+    """
+
+    engine: AsyncEngine
+    max_rows: int
+    interval: float
+    rows_buffered: int
+    rows_flushed: int
+    rows_failed: int
+    _queue: Queue[tuple[Table, dict[str, Any]]]
+    _pending: list[tuple[Table, dict[str, Any]]]
+    _lock: Lock
+    _task: Optional[Task]
+
+    def __init__(self, engine: AsyncEngine, max_rows: int = 500, interval: float = 1.0, max_queue: int = 10000):
+        """
+        Parameters
+        ----------
+        engine: AsyncEngine
+            The engine to write the rows with.
+        max_rows: int
+            The amount of pending rows which triggers a flush.
+        interval: float
+            The maximum amount of seconds a row stays pending.
+        max_queue: int
+            The maximum amount of queued rows, ``put`` waits if the queue is full.
+        """
+        self.engine = engine
+        self.max_rows = max_rows
+        self.interval = interval
+        self.rows_buffered = 0
+        self.rows_flushed = 0
+        self.rows_failed = 0
+
+        self._queue = Queue(maxsize=max_queue)
+        self._pending = []
+        self._lock = Lock()
+        self._task = None
+
+    @property
+    def size(self) -> int:
+        """
+        The amount of rows which aren't written yet.
+        """
+        return self._queue.qsize() + len(self._pending)
+
+    async def put(self, table: Table, row: dict[str, Any]) -> NoReturn:
+        """
+        Queues a row to be inserted into a table.
+
+        Parameters
+        ----------
+        table: Table
+            The table to insert the row into.
+        row: dict[str, Any]
+            The values of the row.
+        """
+        if self._task is None:
+            self._task = create_task(self._run())
+        await self._queue.put((table, row))
+        self.rows_buffered += 1
+
+    async def flush(self) -> int:
+        """
+        Writes all queued rows.
+
+        Returns
+        -------
+        int
+            The amount of written rows.
+        """
+        async with self._lock:
+            while not self._queue.empty():
+                self._pending.append(self._queue.get_nowait())
+            rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+
+            try:
+                await self._insert(rows)
+            except Exception as e:
+                if _unreachable(e):
+                    self._requeue(rows)
+                    raise
+                logger.warning(f"Inserting {len(rows)} buffered rows failed ({e!r}), inserting them one by one")
+                return await self._insert_one_by_one(rows)
+
+            self.rows_flushed += len(rows)
+            return len(rows)
+
+    async def _insert(self, rows: list[tuple[Table, dict[str, Any]]]) -> NoReturn:
+        # rows with different columns can't share one VALUES-clause
+        groups: dict[tuple[Table, tuple[str, ...]], list[dict[str, Any]]] = {}
+        for table, row in rows:
+            groups.setdefault((table, tuple(sorted(row))), []).append(row)
+
+        async with self.engine.begin() as conn:
+            for (table, _), values in groups.items():
+                for i in range(0, len(values), self.max_rows):
+                    await conn.execute(sa_insert(table).values(values[i : i + self.max_rows]))
+
+    async def _insert_one_by_one(self, rows: list[tuple[Table, dict[str, Any]]]) -> int:
+        written = 0
+        for i, (table, row) in enumerate(rows):
+            try:
+                async with self.engine.begin() as conn:
+                    await conn.execute(sa_insert(table).values(row))
+            except Exception as e:
+                if _unreachable(e):
+                    self.rows_flushed += written
+                    self._requeue(rows[i:])
+                    raise
+                logger.error(f"Dropping a buffered row of {table.name!r}: {e!r}")
+                self.rows_failed += 1
+            else:
+                written += 1
+
+        self.rows_flushed += written
+        return written
+
+    def _requeue(self, rows: list[tuple[Table, dict[str, Any]]]) -> NoReturn:
+        """
+        Puts rows back in front of the pending ones, as many as the queue has room for.
+        """
+        room = len(rows) if self._queue.maxsize <= 0 else max(0, self._queue.maxsize - self.size)
+        self._pending[:0] = rows[:room]
+        if dropped := len(rows) - len(rows[:room]):
+            logger.error(f"The write-behind buffer is full, dropping {dropped} rows")
+            self.rows_failed += dropped
+
+    async def close(self) -> NoReturn:
+        """
+        Stops the background task and writes all remaining rows.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> NoReturn:
+        loop = get_running_loop()
+        while True:
+            if not self._pending:  # otherwise rows of a failed flush are waiting
+                self._pending.append(await self._queue.get())
+
+            deadline = loop.time() + self.interval
+            while len(self._pending) < self.max_rows:
+                try:
+                    self._pending.append(await wait_for(self._queue.get(), deadline - loop.time()))
+                except TimeoutError:
+                    break
+
+            try:
+                # shielded, so cancelling the task (.close) doesn't abort a running INSERT
+                await shield(self.flush())
+            except CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Unable to flush the write-behind buffer: {e}")
+                await sleep(self.interval)
+
+
+def _unreachable(e: Exception) -> bool:
+    """
+    Whether the error is caused by the connection rather than the statement, i.e. retrying may succeed.
+    """
+    return isinstance(e, (OperationalError, InterfaceError, DisconnectionError, OSError)) or (
+        isinstance(e, DBAPIError) and e.connection_invalidated
+    )
@@ -0,0 +1,41 @@
+"""
+Compares building statements per call with the memoized shapes of ``bound_filter_by``.
+
+Usage: ``TOKEN=- python -m benchmarks.statements`` (runs against an in-memory sqlite database).
+"""
+
+from AlbertUnruhUtils.utils.logger import get_logger
+from sqlalchemy.engine import create_engine
+from timeit import timeit
+from typing import Callable
+from AlbertoX3.database import Base, bound_filter_by, filter_by
+from AlbertoX3.permission import PermissionModel
+
+N = 20_000
+
+logger = get_logger(None, level="INFO")
+
+
+def bench(name: str, func: Callable[[], object]) -> None:
+    logger.info(f"{name:<32} {timeit(func, number=N) / N * 1e6:8.2f} µs/call")
+
+
+def main() -> None:
+    bench("build filter_by", lambda: filter_by(PermissionModel, permission="administration.read"))
+    bench("build bound_filter_by", lambda: bound_filter_by(PermissionModel, permission="administration.read"))
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[PermissionModel.__table__])
+    with engine.connect() as conn:
+        bench(
+            "execute filter_by",
+            lambda: conn.execute(filter_by(PermissionModel, permission="administration.read")).all(),
+        )
+        bench(
+            "execute bound_filter_by",
+            lambda: conn.execute(*bound_filter_by(PermissionModel, permission="administration.read")).all(),
+        )
+
+
+if __name__ == "__main__":
+    main()
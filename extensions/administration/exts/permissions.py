@@ -1,7 +1,6 @@
 __all__ = ("Permissions",)
 
 
-import asyncio
 from AlbertoX3.constants import Config
 from AlbertoX3.naff_wrapper import Extension
 from AlbertoX3.permission import BasePermission, BasePermissionLevel
@@ -37,7 +36,7 @@ class Permissions(Extension):
     async def p_list_permissions(ctx: InteractionContext, title: str, min_level: BasePermissionLevel) -> Message:
         out: dict[tuple[str, str], list[str]] = {}
         permissions: list[BasePermission] = get_permissions()
-        levels = await asyncio.gather(*[permission.resolve() for permission in permissions])
+        levels = await BasePermission.resolve_many(permissions)
         for permission, level in zip(permissions, levels):
             if min_level.level >= level.level:
                 key = (level.level, level.description)
@@ -1,20 +1,29 @@
 __all__ = ("Sudo",)
 
 
+from AlbertoX3.cache import CacheNamespace
 from AlbertoX3.constants import Config
-from AlbertoX3.database import redis
+from AlbertoX3.database import db_wrapper
 from AlbertoX3.environment import OWNER_ID
 from AlbertoX3.naff_wrapper import Extension
 from AlbertoX3.permission import permission_override
 from AlbertoX3.translations import TranslationNamespace, t
-from AlbertoX3.utils import get_logger
+from AlbertoX3.utils import get_logger, warm_up_caches
+from asyncio.tasks import Task, create_task
 from naff.api.events.internal import CommandCompletion
 from naff.client.client import Client
 from naff.models.discord.channel import BaseChannel
-from naff.models.naff.application_commands import SlashCommand, slash_command
+from naff.models.naff.application_commands import (
+    OptionTypes,
+    SlashCommand,
+    SlashCommandChoice,
+    SlashCommandOption,
+    slash_command,
+)
 from naff.models.naff.command import check
 from naff.models.naff.context import InteractionContext
 from naff.models.naff.listener import listen
+from typing import NoReturn, Optional
 from ..permission import AdministrationPermission
 
 
@@ -33,6 +42,7 @@ async def is_super_user(ctx: InteractionContext) -> bool:
 class Sudo(Extension):
     def __init__(self, bot: Client):
         self.s_command_cache: dict[BaseChannel, tuple[SlashCommand, list, dict]] = {}
+        self.s_warm_up: Optional[Task] = None
 
     @listen()
     async def on_owner_cmd(self, event: CommandCompletion):
@@ -59,11 +69,43 @@ class Sudo(Extension):
     @s_sudo.subcommand(
         sub_cmd_name="clear-cache",
         sub_cmd_description="Clear the bot's cache",
+        options=[
+            SlashCommandOption(
+                name="namespace",
+                type=OptionTypes.STRING,
+                description="Only clear this namespace",
+                required=False,
+                choices=[SlashCommandChoice(name, name) for name in CacheNamespace.namespaces],
+            ),
+            SlashCommandOption(
+                name="extension",
+                type=OptionTypes.STRING,
+                description="Only clear the keys of this extension",
+                required=False,
+            ),
+        ],
     )
     @AdministrationPermission.s_clear_cache.check
-    async def s_clear_cache(self, ctx: InteractionContext):
-        await redis.flushdb()
-        await ctx.send(t.s.done.cache)
+    async def s_clear_cache(self, ctx: InteractionContext, namespace: str = None, extension: str = None):
+        prefix = "" if extension is None else f"{extension}."
+        keys = 0
+        for name, cache in CacheNamespace.namespaces.items():
+            if namespace is None or name == namespace:
+                keys += await cache.flush(prefix)
+        await ctx.send(t.s.done.cache(keys=keys))
+
+        # refill the cleared keys before the next commands miss them
+        self.s_warm_up = create_task(db_wrapper(warm_up_caches)(extension))
+        self.s_warm_up.add_done_callback(self._on_warm_up_done)
+
+    @staticmethod
+    def _on_warm_up_done(task: Task) -> NoReturn:
+        if task.cancelled():
+            return
+        if (e := task.exception()) is not None:
+            logger.error("Warming up the caches after clearing them failed", exc_info=e)
+            return
+        logger.info(f"Warmed up the caches with {task.result()} keys")
 
     # reload
 
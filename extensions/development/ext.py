@@ -1,9 +1,9 @@
 __all__ = ("Debug",)
 
 
-from AlbertoX3 import get_logger, get_value_table, Config, Extension
+from AlbertoX3 import get_logger, get_value_table, CacheNamespace, Config, Extension, MemoryMetrics, db
 from io import StringIO
-from naff import InteractionContext, File
+from naff import InteractionContext, File, OptionTypes, SlashCommandOption
 from naff.ext.debug_extension import DebugExtension
 
 
@@ -16,3 +16,59 @@ class Debug(DebugExtension, Extension):
         f = File(file=StringIO(get_value_table(Config)), file_name="config.log")
 
         await ctx.send(files=f)
+
+    @DebugExtension.debug_info.subcommand(
+        "indexes",
+        sub_cmd_description="Suggest missing indexes from recorded statements",
+        options=[
+            SlashCommandOption(
+                name="ddl",
+                description="Whether the DDL should be included",
+                type=OptionTypes.BOOLEAN,
+                required=False,
+            ),
+        ],
+    )
+    async def indexes_info(self, ctx: InteractionContext, ddl: bool = False) -> None:
+        if db.recorder is None:
+            await ctx.send("Statements aren't recorded, set `DB_RECORD_STATEMENTS` to enable it.")
+            return
+
+        lines = []
+        for suggestion in db.recorder.suggest_indexes(db.engine.dialect):
+            lines.append(
+                f"{suggestion.table} ({', '.join(suggestion.columns)}): "
+                f"{suggestion.statements} statements, {suggestion.total * 1000:.1f}ms"
+            )
+            if ddl:
+                lines.append(f"    {suggestion.ddl};")
+
+        f = File(file=StringIO("\n".join(lines) or "No missing indexes found."), file_name="indexes.log")
+        await ctx.send(files=f)
+
+    @DebugExtension.debug_info.subcommand("pool", sub_cmd_description="Get metrics of the database pool and sessions")
+    async def pool_info(self, ctx: InteractionContext) -> None:
+        if not isinstance(db.metrics, MemoryMetrics):
+            await ctx.send(f"Metrics are sent to `{type(db.metrics).__name__}`.")
+            return
+
+        f = File(file=StringIO(db.metrics.render() or "No metrics recorded yet."), file_name="pool.log")
+        await ctx.send(files=f)
+
+    # "cache" is already taken by naff's debug extension
+    @DebugExtension.debug_info.subcommand("caches", sub_cmd_description="Get hit rates and policies of the caches")
+    async def caches_info(self, ctx: InteractionContext) -> None:
+        lines = []
+        for name, cache in sorted(CacheNamespace.namespaces.items()):
+            stats, policy = cache.stats, cache.policy
+            lines.append(
+                f"{name}: lookups={stats.lookups} hit_rate={stats.hit_rate:.1%} local_hits={stats.local_hits} "
+                f"redis_hits={stats.redis_hits} misses={stats.misses}\n"
+                f"    loads={stats.loads.count} mean={stats.loads.mean * 1000:.2f} "
+                f"p95={stats.loads.quantile(0.95) * 1000:.2f} max={stats.loads.max * 1000:.2f}\n"
+                f"    local={len(cache.local)}/{policy.local_size} evictions={cache.local.evictions} "
+                f"ttl={policy.ttl}s local_ttl={policy.local_ttl}s negative_ttl={policy.negative_ttl}s"
+            )
+
+        f = File(file=StringIO("\n".join(lines) or "No caches registered."), file_name="caches.log")
+        await ctx.send(files=f)
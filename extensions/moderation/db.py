@@ -18,7 +18,7 @@ class BanModel(Base):
     __tablename__ = "ban"
 
     id: Column | int = Column(Integer, primary_key=True, unique=True, autoincrement=True, nullable=False)
-    member: Column | int = Column(BigInteger, nullable=False)
+    member: Column | int = Column(BigInteger, nullable=False, index=True)
     executor: Column | int = Column(BigInteger, nullable=False)
     timestamp: Column | datetime = Column(UTCDatetime, nullable=False)
     reason: Column | str = Column(Text(128), nullable=False)
@@ -26,7 +26,7 @@ class BanModel(Base):
 
     @staticmethod
     async def add(member: int, executor: int, reason: str, until: datetime | None) -> "BanModel":
-        return await db.add(
+        return await db.add_buffered(
             BanModel(
                 member=member,
                 executor=executor,
@@ -41,14 +41,14 @@ class UnbanModel(Base):
     __tablename__ = "unban"
 
     id: Column | int = Column(Integer, primary_key=True, unique=True, autoincrement=True, nullable=False)
-    member: Column | int = Column(BigInteger, nullable=False)
+    member: Column | int = Column(BigInteger, nullable=False, index=True)
     executor: Column | int = Column(BigInteger, nullable=False)
     timestamp: Column | datetime = Column(UTCDatetime, nullable=False)
     reason: Column | str = Column(Text(128), nullable=False)
 
     @staticmethod
     async def add(member: int, executor: int, reason: str) -> "UnbanModel":
-        return await db.add(
+        return await db.add_buffered(
             UnbanModel(
                 member=member,
                 executor=executor,
@@ -62,14 +62,14 @@ class KickModel(Base):
     __tablename__ = "kick"
 
     id: Column | int = Column(Integer, primary_key=True, unique=True, autoincrement=True, nullable=False)
-    member: Column | int = Column(BigInteger, nullable=False)
+    member: Column | int = Column(BigInteger, nullable=False, index=True)
     executor: Column | int = Column(BigInteger, nullable=False)
     timestamp: Column | datetime = Column(UTCDatetime, nullable=False)
     reason: Column | str = Column(Text(128), nullable=False)
 
     @staticmethod
     async def add(member: int, executor: int, reason: str) -> "KickModel":
-        return await db.add(
+        return await db.add_buffered(
             KickModel(
                 member=member,
                 executor=executor,
@@ -83,7 +83,7 @@ class MuteModel(Base):
     __tablename__ = "mute"
 
     id: Column | int = Column(Integer, primary_key=True, unique=True, autoincrement=True, nullable=False)
-    member: Column | int = Column(BigInteger, nullable=False)
+    member: Column | int = Column(BigInteger, nullable=False, index=True)
     executor: Column | int = Column(BigInteger, nullable=False)
     timestamp: Column | datetime = Column(UTCDatetime, nullable=False)
     reason: Column | str = Column(Text(128), nullable=False)
@@ -91,7 +91,7 @@ class MuteModel(Base):
 
     @staticmethod
     async def add(member: int, executor: int, reason: str, until: datetime | None) -> "MuteModel":
-        return await db.add(
+        return await db.add_buffered(
             MuteModel(
                 member=member,
                 executor=executor,
@@ -106,14 +106,14 @@ class UnmuteModel(Base):
     __tablename__ = "unmute"
 
     id: Column | int = Column(Integer, primary_key=True, unique=True, autoincrement=True, nullable=False)
-    member: Column | int = Column(BigInteger, nullable=False)
+    member: Column | int = Column(BigInteger, nullable=False, index=True)
     executor: Column | int = Column(BigInteger, nullable=False)
     timestamp: Column | datetime = Column(UTCDatetime, nullable=False)
     reason: Column | str = Column(Text(128), nullable=False)
 
     @staticmethod
     async def add(member: int, executor: int, reason: str) -> "UnmuteModel":
-        return await db.add(
+        return await db.add_buffered(
             UnmuteModel(
                 member=member,
                 executor=executor,
@@ -135,7 +135,7 @@ class DeleteModel(Base):
 
     @staticmethod
     async def add(amount: int, channel: int, executor: int, user: int | None) -> "DeleteModel":
-        return await db.add(
+        return await db.add_buffered(
             DeleteModel(
                 amount=amount,
                 channel=channel,
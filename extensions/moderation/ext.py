@@ -8,13 +8,20 @@ from AlbertoX3.utils import get_logger
 from naff.models.discord.user import Member
 from naff.models.naff.application_commands import OptionTypes, SlashCommandOption, slash_command
 from naff.models.naff.context import InteractionContext
+from naff.models.naff.listener import listen
 from .db import BanModel, UnbanModel, KickModel, MuteModel, UnmuteModel, DeleteModel
+from .sanctions import active_sanctions, sanction_jobs, schedule_expiry
 
 
 logger = get_logger(__name__)
 
 
 class Moderation(Extension):
+    @listen()
+    async def on_startup(self):
+        await active_sanctions.load()
+        await sanction_jobs.start()
+
     @slash_command(
         "ban",
         description="Wields the ban-hammer",
@@ -63,6 +70,8 @@ class Moderation(Extension):
             reason=reason,
             until=until,
         )
+        await active_sanctions.add("ban", user.id, until)
+        await schedule_expiry("ban", user.id, ctx.bot.user.id)
 
         if until:
             info = f"(until <t:{int(until.timestamp())}:f>)"
@@ -102,6 +111,8 @@ class Moderation(Extension):
             executor=ctx.author.id,
             reason=reason,
         )
+        await active_sanctions.remove("ban", user.id)
+        await sanction_jobs.cancel(f"unban:{user.id}")
 
         await ctx.send(f"Unbanned ``{user.tag}`` with reason ``{reason}``")
 
@@ -187,6 +198,8 @@ class Moderation(Extension):
             reason=reason,
             until=until,
         )
+        await active_sanctions.add("mute", user.id, until)
+        await schedule_expiry("mute", user.id, ctx.bot.user.id)
 
         if until:
             info = f"(until <t:{int(until.timestamp())}:f>)"
@@ -226,6 +239,8 @@ class Moderation(Extension):
             executor=ctx.author.id,
             reason=reason,
         )
+        await active_sanctions.remove("mute", user.id)
+        await sanction_jobs.cancel(f"unmute:{user.id}")
 
         await ctx.send(f"Unmuted ``{user.tag}`` with reason ``{reason}``")
 
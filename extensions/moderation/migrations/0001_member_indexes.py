@@ -0,0 +1,8 @@
+from AlbertoX3.migrations import Migrator
+from typing import NoReturn
+
+
+async def upgrade(migrator: Migrator) -> NoReturn:
+    # all sanction-lookups filter by the member
+    for table in ("ban", "unban", "kick", "mute", "unmute"):
+        await migrator.create_index(table, f"ix_{table}_member", "member")
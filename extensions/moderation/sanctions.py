@@ -0,0 +1,197 @@
+__all__ = (
+    "ActiveSanctions",
+    "active_sanctions",
+    "sanction_jobs",
+    "schedule_expiry",
+)
+
+
+from AlbertoX3.aio import DelayedJobs
+from AlbertoX3.database import db, db_wrapper, exists, redis, select
+from AlbertoX3.environment import SANCTIONS_REDIS
+from AlbertoX3.utils import get_logger
+from datetime import datetime
+from heapq import heappop, heappush
+from math import inf
+from sqlalchemy.sql.expression import or_
+from time import time
+from typing import Any, Literal, NoReturn, Optional
+from .db import BanModel, UnbanModel, MuteModel, UnmuteModel
+
+
+logger = get_logger(__name__)
+
+_KIND = Literal["ban", "mute"]
+
+
+class ActiveSanctions:
+    """
+    An index of all members which are banned or muted right now.
+
+    Notes
+    -----
+    Lookups don't touch the database. Entries expire at their ``until``-time,
+    permanent sanctions are stored with an ``until`` of ``inf``.
+    With ``shared`` a copy is kept in redis (``sanctions:<kind>`` hashes), lookups go there
+    and see the changes of all processes.
+    """
+
+    shared: bool
+    _active: dict[_KIND, dict[int, float]]
+    _expiry: list[tuple[float, _KIND, int]]
+
+    def __init__(self, shared: bool = False):
+        self.shared = shared
+        self._active = {"ban": {}, "mute": {}}
+        self._expiry = []
+
+    async def load(self) -> NoReturn:
+        """
+        Loads the active sanctions from the database.
+        """
+        now = datetime.utcnow()
+        for kind, model, lift in (("ban", BanModel, UnbanModel), ("mute", MuteModel, UnmuteModel)):
+            lifted = exists().where(lift.member == model.member, lift.timestamp > model.timestamp)
+            active: dict[int, float] = {}
+            query = (
+                select(model.member)
+                .add_columns(model.until, model.id)
+                .where(or_(model.until.is_(None), model.until > now), ~lifted)
+            )
+            # paged, so a long history doesn't have to be loaded at once
+            async for page in db.paginate(query, key=model.id, page_size=1000):
+                for member, until, _ in page.items:
+                    until = inf if until is None else until.timestamp()
+                    active[member] = max(active.get(member, 0), until)
+
+            self._active[kind] = active
+            for member, until in active.items():
+                if until != inf:
+                    heappush(self._expiry, (until, kind, member))
+
+            if self.shared:
+                async with redis.pipeline() as pipe:
+                    pipe.delete(f"sanctions:{kind}")
+                    if active:
+                        pipe.hset(f"sanctions:{kind}", mapping={m: repr(u) for m, u in active.items()})
+                    await pipe.execute()
+
+            logger.info(f"Loaded {len(active)} active {kind}s")
+
+    async def add(self, kind: _KIND, member: int, until: Optional[datetime]) -> NoReturn:
+        """
+        Adds a sanction, a longer one which is already active wins.
+        """
+        until_ts = inf if until is None else until.timestamp()
+        if until_ts <= time():
+            return
+
+        active = self._active[kind]
+        active[member] = max(active.get(member, 0), until_ts)
+        if until_ts != inf:
+            heappush(self._expiry, (until_ts, kind, member))
+
+        if self.shared:
+            await self._extend(kind, member, until_ts)
+
+    @staticmethod
+    async def _extend(kind: _KIND, member: int, until: float) -> NoReturn:
+        """
+        Sets the end of a shared sanction unless another process stored a longer one.
+        """
+        key = f"sanctions:{kind}"
+
+        async def extend(pipe: Any) -> NoReturn:
+            if (current := await pipe.hget(key, member)) is not None and float(current) >= until:
+                return
+            pipe.multi()
+            pipe.hset(key, member, repr(until))
+
+        # fails if another process changed the sanctions meanwhile, they're compared again then
+        await redis.transaction(extend, key)
+
+    async def remove(self, kind: _KIND, member: int) -> NoReturn:
+        """
+        Lifts a sanction (e.g. on unban/unmute).
+        """
+        self._active[kind].pop(member, None)
+        if self.shared:
+            await redis.hdel(f"sanctions:{kind}", member)
+
+    async def until(self, kind: _KIND, member: int) -> Optional[float]:
+        """
+        Returns
+        -------
+        float, optional
+            The timestamp the sanction ends at (``inf`` if it's permanent), ``None`` if there is no active one.
+        """
+        self._expire()
+
+        if self.shared:
+            if (value := await redis.hget(f"sanctions:{kind}", member)) is None:
+                return None
+            if (until := float(value)) <= time():
+                await redis.hdel(f"sanctions:{kind}", member)
+                return None
+            return until
+
+        if (until := self._active[kind].get(member)) is None or until <= time():
+            return None
+        return until
+
+    async def is_active(self, kind: _KIND, member: int) -> bool:
+        return await self.until(kind, member) is not None
+
+    async def is_banned(self, member: int) -> bool:
+        return await self.is_active("ban", member)
+
+    async def is_muted(self, member: int) -> bool:
+        return await self.is_active("mute", member)
+
+    def _expire(self) -> NoReturn:
+        now = time()
+        while self._expiry and self._expiry[0][0] <= now:
+            until, kind, member = heappop(self._expiry)
+            # the sanction might have been lifted or extended in the meantime
+            if self._active[kind].get(member) == until:
+                del self._active[kind][member]
+
+
+active_sanctions: ActiveSanctions = ActiveSanctions(shared=SANCTIONS_REDIS)
+
+
+sanction_jobs: DelayedJobs = DelayedJobs("moderation", redis)
+
+
+async def schedule_expiry(kind: _KIND, member: int, executor: int) -> NoReturn:
+    """
+    Schedules lifting the active sanction at its end, permanent (or lifted) ones won't be lifted.
+
+    Parameters
+    ----------
+    kind: Literal["ban", "mute"]
+        The kind of the sanction.
+    member: int
+        The sanctioned member.
+    executor: int
+        Who lifts the sanction (the bot itself).
+    """
+    job_id = f"un{kind}:{member}"
+    if (until := await active_sanctions.until(kind, member)) is None or until == inf:
+        await sanction_jobs.cancel(job_id)
+    else:
+        await sanction_jobs.schedule(f"un{kind}", {"member": member, "executor": executor}, until, job_id=job_id)
+
+
+@sanction_jobs.handler("unban")
+@db_wrapper
+async def _lift_ban(payload: dict) -> NoReturn:
+    await UnbanModel.add(member=payload["member"], executor=payload["executor"], reason="SANCTION EXPIRED")
+    await active_sanctions.remove("ban", payload["member"])
+
+
+@sanction_jobs.handler("unmute")
+@db_wrapper
+async def _lift_mute(payload: dict) -> NoReturn:
+    await UnmuteModel.add(member=payload["member"], executor=payload["executor"], reason="SANCTION EXPIRED")
+    await active_sanctions.remove("mute", payload["member"])
@@ -1,22 +1,42 @@
-__all__ = ("CaseFileModel",)
+__all__ = (
+    "CaseFileModel",
+    "CaseFileParticipantModel",
+    "CaseFileStatsModel",
+)
 
 
+from AlbertoX3.aio import LockDeco
 from AlbertoX3.constants import MISSING
-from AlbertoX3.database import Base, UTCDatetime, db
+from AlbertoX3.database import Base, UTCDatetime, db, delete, select
 from datetime import datetime
 from naff.client.const import EMBED_FIELD_VALUE_LENGTH
-from sqlalchemy.sql.functions import func
+from typing import NoReturn
+from sqlalchemy.sql.expression import union, update
+from sqlalchemy.sql.functions import count, func
 from sqlalchemy.sql.schema import Column
 from sqlalchemy.sql.sqltypes import BigInteger, Integer, Text
 
 
+_PARTICIPANT_FIELDS: tuple[str, ...] = (
+    "author",
+    "judge",
+    "lay_judge",
+    "complainant",
+    "complainant_lawyer",
+    "defendant",
+    "defendant_lawyer",
+    "witness",
+    "expert",
+)
+
+
 class CaseFileModel(Base):
     __tablename__ = "case_file"
 
     id: Column | int = Column(Integer, primary_key=True, unique=True, autoincrement=True, nullable=False)
     author: Column | int = Column(BigInteger, nullable=False)
     created: Column | datetime = Column(UTCDatetime, nullable=False)
-    last_edited: Column | datetime = Column(UTCDatetime, nullable=False)
+    last_edited: Column | datetime = Column(UTCDatetime, nullable=False, index=True)
     status: Column | int = Column(Integer, nullable=False)
     judge: Column | int = Column(BigInteger, nullable=False)
     lay_judge: Column | int | None = Column(BigInteger, nullable=True)
@@ -72,16 +92,23 @@ class CaseFileModel(Base):
         expert: int | None,
         accusation: str,
     ) -> "CaseFileModel":
-        return await db.add(CaseFileModel.preview(**locals()))
+        case = CaseFileModel.preview(**locals())
+        await CaseFileStatsModel.get()  # the statistics have to exist before, otherwise the case gets counted twice
+        await db.add(case)
+        await CaseFileStatsModel.track(case_files=1, added=case.participants, last_edited=case.last_edited)
+        return case
 
     @staticmethod
     async def get_by_id(id: int) -> "CaseFileModel | None":  # noqa A002
         return await db.get(CaseFileModel, id=id)
 
     @staticmethod
-    async def get_last_recent_updated() -> "CaseFileModel":
-        last_edited = await db.get(func.max(CaseFileModel.last_edited))
-        return await db.get(CaseFileModel, last_edited=last_edited)
+    async def get_last_recent_updated() -> "CaseFileModel | None":
+        return await db.first(select(CaseFileModel).order_by(CaseFileModel.last_edited.desc()).limit(1))
+
+    @property
+    def participants(self) -> set[int]:
+        return {p for f in _PARTICIPANT_FIELDS if (p := getattr(self, f)) is not None}
 
     async def edit(
         self,
@@ -100,9 +127,128 @@ class CaseFileModel(Base):
         args = locals()
         args.pop("self")
 
+        old_participants = self.participants
         for name, value in args.items():
             if value is not MISSING:
                 setattr(self, name, value)
 
         self.last_edited = datetime.utcnow()
+        await CaseFileStatsModel.track(
+            added=self.participants - old_participants,
+            removed=old_participants - self.participants,
+            last_edited=self.last_edited,
+        )
         return self
+
+
+class CaseFileParticipantModel(Base):
+    __tablename__ = "case_file_participant"
+
+    participant: Column | int = Column(BigInteger, primary_key=True, unique=True, autoincrement=False, nullable=False)
+    cases: Column | int = Column(Integer, nullable=False)
+
+
+class CaseFileStatsModel(Base):
+    """
+    Incrementally maintained statistics about all case files (only has a single row).
+    """
+
+    __tablename__ = "case_file_stats"
+
+    id: Column | int = Column(Integer, primary_key=True, unique=True, autoincrement=False, nullable=False)
+    case_files: Column | int = Column(Integer, nullable=False)
+    participants: Column | int = Column(Integer, nullable=False)
+    last_edited: Column | datetime | None = Column(UTCDatetime, nullable=True)
+
+    @staticmethod
+    async def get() -> "CaseFileStatsModel":
+        if (row := await db.get(CaseFileStatsModel, id=1)) is None:
+            row = await CaseFileStatsModel.rebuild()
+        return row
+
+    @staticmethod
+    @LockDeco
+    async def rebuild() -> "CaseFileStatsModel":
+        """
+        Recalculates the statistics from all case files, only needed once if they don't exist yet.
+
+        Notes
+        -----
+        Rebuilds of this process run one after another. The calculated values overwrite the stored ones,
+        so concurrent rebuilds of other processes end up with the same statistics.
+        """
+        model = CaseFileParticipantModel
+
+        # UNION removes duplicates, so participants with multiple roles in one case are counted once
+        cases = union(
+            *[
+                select(CaseFileModel.id).add_columns(getattr(CaseFileModel, f).label("participant"))
+                for f in _PARTICIPANT_FIELDS
+            ]
+        ).subquery()
+        participant = cases.c.participant
+        participants = (
+            await db.exec(select(participant).add_columns(count()).where(participant.isnot(None)).group_by(participant))
+        ).all()
+        await db.upsert_many(model, [{"participant": p, "cases": cnt} for p, cnt in participants])
+        outdated = model.participant.notin_(select(participant).where(participant.isnot(None)))
+        await db.exec(delete(model).where(outdated).execution_options(synchronize_session=False))
+
+        await db.upsert(
+            CaseFileStatsModel,
+            {
+                "id": 1,
+                "case_files": await db.count(CaseFileModel),
+                "participants": len(participants),
+                "last_edited": await db.first(select(func.max(CaseFileModel.last_edited))),
+            },
+        )
+        return await db.get(CaseFileStatsModel, id=1)
+
+    @staticmethod
+    async def track(
+        *,
+        case_files: int = 0,
+        added: set[int] = frozenset(),
+        removed: set[int] = frozenset(),
+        last_edited: datetime | None = MISSING,
+    ) -> NoReturn:
+        """
+        Applies the changes of a created or edited case file.
+
+        Parameters
+        ----------
+        case_files: int
+            The change of the amount of case files.
+        added: set[int]
+            Participants who are now taking part in the case file.
+        removed: set[int]
+            Participants who are no longer taking part in the case file.
+        last_edited: datetime, optional
+            The new time of the last activity.
+        """
+        await CaseFileStatsModel.get()
+        model = CaseFileParticipantModel
+        participants = 0
+
+        if added:
+            # atomic, so cases created at the same time can share new participants
+            await db.upsert_many(
+                model, [{"participant": p, "cases": 1} for p in added], update={"cases": model.cases + 1}
+            )
+            # existing participants take part in at least one other case, the row lock keeps it from changing
+            new = select(count()).select_from(model).where(model.participant.in_(added), model.cases == 1)
+            participants += await db.first(new)
+
+        if removed:
+            await db.exec(update(model).where(model.participant.in_(removed)).values(cases=model.cases - 1))
+            result = await db.exec(delete(model).where(model.participant.in_(removed), model.cases <= 0))
+            participants -= result.rowcount
+
+        values = {
+            "case_files": CaseFileStatsModel.case_files + case_files,
+            "participants": CaseFileStatsModel.participants + participants,
+        }
+        if last_edited is not MISSING:
+            values["last_edited"] = last_edited
+        await db.exec(update(CaseFileStatsModel).where(CaseFileStatsModel.id == 1).values(**values))
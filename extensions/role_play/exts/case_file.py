@@ -1,7 +1,7 @@
 __all__ = ("CaseFile",)
 
 
-from AlbertoX3.database import db, select
+from AlbertoX3.database import db
 from AlbertoX3.naff_wrapper import Extension
 from AlbertoX3.translations import TranslationNamespace, t
 from AlbertoX3.utils import get_logger
@@ -16,7 +16,7 @@ from naff.models.naff.application_commands import OptionTypes, SlashCommandChoic
 from naff.models.naff.command import check
 from naff.models.naff.context import InteractionContext, ModalContext
 from ..colors import Colors
-from ..db import CaseFileModel
+from ..db import CaseFileModel, CaseFileStatsModel
 from ..permission import RolePlayPermission
 
 
@@ -70,30 +70,13 @@ class CaseFile(Extension):
             color=Colors.case_file,
         )
 
-        participants: set[int | None] = {None}  # None will be added since fields are nullable
-        total = 0  # ID isn't reliable since CF's can be deleted
-        participant_fields: set[str] = {
-            "author",
-            "judge",
-            "complainant",
-            "defendant",
-            "lay_judge",
-            "complainant_lawyer",
-            "defendant_lawyer",
-            "witness",
-            "expert",
-        }
-        async for cf in await db.stream(select(CaseFileModel)):
-            participants.update({getattr(cf, p) for p in participant_fields})
-            total += 1
-        participants.discard(None)
-
+        stats = await CaseFileStatsModel.get()
         embed.add_field(
             name=t.cf.about.statistics.title,
             value=t.cf.about.statistics.description(
-                case_files=total,
-                participants=len(participants),
-                last_edited=int((await CaseFileModel.get_last_recent_updated()).last_edited.timestamp()),
+                case_files=stats.case_files,
+                participants=stats.participants,
+                last_edited=int(stats.last_edited.timestamp()) if stats.last_edited is not None else 0,
                 latest_link=self.cf_latest.mention(scope=ctx.guild.id),
             ),
         )
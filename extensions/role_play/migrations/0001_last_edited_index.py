@@ -0,0 +1,7 @@
+from AlbertoX3.migrations import Migrator
+from typing import NoReturn
+
+
+async def upgrade(migrator: Migrator) -> NoReturn:
+    # /case-file about fetches the most recently edited case file
+    await migrator.create_index("case_file", "ix_case_file_last_edited", "last_edited")
@@ -0,0 +1,77 @@
+import os
+import pytest
+import pytest_asyncio
+
+from pathlib import Path
+from typing import Iterator
+
+# has to happen before AlbertoX3 reads the environment
+os.environ.setdefault("TOKEN", "")
+os.environ.setdefault("DB_DRIVER", "sqlite+aiosqlite")
+os.environ.setdefault("DB_DATABASE", ":memory:")
+os.environ.setdefault("REDIS_BACKEND", "memory")
+
+from AlbertoX3 import database  # noqa: E402
+from AlbertoX3.cache import CacheNamespace  # noqa: E402
+
+__all__ = ()
+
+
+@pytest.fixture(autouse=True)
+def cache_namespaces() -> Iterator[dict[str, CacheNamespace]]:
+    """
+    The registered ``CacheNamespace``-s, the ones a test creates get unregistered afterwards.
+    """
+    registered = dict(CacheNamespace.namespaces)
+    yield CacheNamespace.namespaces
+    # also restores the global namespaces a test replaced by creating one with the same name
+    CacheNamespace.namespaces.clear()
+    CacheNamespace.namespaces.update(registered)
+
+
+@pytest_asyncio.fixture()
+async def memory_redis() -> database.MemoryRedis:
+    """
+    The global redis client, an empty ``MemoryRedis``.
+    """
+    if not isinstance(database.redis, database.MemoryRedis):
+        pytest.skip("REDIS_BACKEND isn't 'memory'")
+
+    await database.redis.flushdb()
+    yield database.redis
+    await database.redis.flushdb()
+
+
+@pytest_asyncio.fixture()
+async def sqlite_db(memory_redis: database.MemoryRedis) -> database.DB:
+    """
+    The global database with all tables of ``Base``-models.
+
+    Notes
+    -----
+    Async fixtures may run in another context than the test, therefore the test has to open
+    the session itself (e.g. with ``@database.db_wrapper``).
+    """
+    db = database.db
+    if db.engine.dialect.name != "sqlite":
+        pytest.skip("DB_DRIVER isn't sqlite")
+
+    async with db.engine.begin() as conn:
+        await conn.run_sync(database.Base.metadata.create_all)
+    yield db
+    async with db.engine.begin() as conn:
+        await conn.run_sync(database.Base.metadata.drop_all)
+    db.entity_cache.clear()
+    await db.engine.dispose()
+
+
+@pytest_asyncio.fixture()
+async def file_db(tmp_path: Path) -> database.DB:
+    """
+    A ``DB`` on a new sqlite file in ``tmp_path`` with all tables of ``Base``-models.
+    """
+    db = database.DB("sqlite+aiosqlite", "", 0, str(tmp_path / "db.sqlite"), "", "")
+    async with db.engine.begin() as conn:
+        await conn.run_sync(database.Base.metadata.create_all)
+    yield db
+    await db.engine.dispose()
@@ -0,0 +1,238 @@
+import asyncio
+import pytest
+import time
+
+from inspect import isawaitable
+from typing import Any, Awaitable, Callable
+from AlbertoX3 import aio, database, errors
+
+
+__all__ = ()
+
+
+@pytest.mark.asyncio
+async def test_single_flight():
+    flight = aio.SingleFlight()
+    calls = []
+
+    async def load(key: str) -> str:
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key.upper()
+
+    results = await asyncio.gather(*(flight.do(k, load, k) for k in ("a", "a", "b", "a")))
+    assert results == ["A", "A", "B", "A"]
+    assert sorted(calls) == ["a", "b"]
+    assert len(flight) == 0
+
+    async def fail() -> None:
+        await asyncio.sleep(0.01)
+        raise ValueError
+
+    for result in await asyncio.gather(flight.do("c", fail), flight.do("c", fail), return_exceptions=True):
+        assert isinstance(result, ValueError)
+
+
+@pytest.mark.asyncio
+async def test_keyed_lock():
+    locks = aio.KeyedLock()
+    async with locks("a"):
+        assert locks.locked("a")
+        async with locks("b"):  # doesn't wait for "a"
+            assert locks.locked("b")
+    assert not locks.locked("a") and not locks._locks
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker():
+    healthy = False
+    recovered = []
+
+    async def call() -> str:
+        if not healthy:
+            raise ConnectionError
+        return "ok"
+
+    async def probe() -> None:
+        await call()
+
+    async def on_recovery() -> None:
+        recovered.append(True)
+
+    breaker = aio.CircuitBreaker("test", probe, threshold=2, recovery_interval=0.01)
+    breaker.on_recovery(on_recovery)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            await breaker.call(call)
+    assert breaker.is_open
+    with pytest.raises(errors.CircuitOpenError):
+        await breaker.call(call)
+
+    healthy = True
+    await asyncio.sleep(0.05)
+    assert not breaker.is_open and recovered == [True]
+    assert await breaker.call(call) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_data_loader():
+    batches = []
+
+    async def load(keys: list[int]) -> list[int]:
+        batches.append(keys)
+        return [key * 2 for key in keys]
+
+    loader = aio.DataLoader(load, max_batch_size=3)
+    assert await asyncio.gather(loader.load(1), loader.load(2), loader.load(1)) == [2, 4, 2]
+    assert batches == [[1, 2]]
+    assert await loader.load_many(range(4)) == [0, 2, 4, 6]
+    assert batches[1:] == [[0, 1, 2], [3]]
+
+
+async def _until(predicate: Callable[[], bool | Awaitable[bool]], timeout: float = 1) -> None:
+    async def wait() -> None:
+        while not ((await result) if isawaitable(result := predicate()) else result):
+            await asyncio.sleep(0.005)
+
+    await asyncio.wait_for(wait(), timeout)
+
+
+@pytest.mark.asyncio
+async def test_delayed_jobs(memory_redis: database.MemoryRedis):
+    jobs = aio.DelayedJobs("test", memory_redis, poll_interval=0.01)
+    done = []
+
+    @jobs.handler("append")
+    async def append(payload: dict) -> None:
+        done.append(payload["value"])
+
+    await jobs.schedule("append", {"value": 1}, time.time() + 0.02)
+    await jobs.schedule("append", {"value": 2}, time.time() + 60, job_id="later")
+    assert await jobs.pending() == 2
+    await jobs.start()
+    await _until(lambda: done == [1])
+    await _until(lambda: not jobs._running)
+    assert list(await memory_redis.hgetall("jobs:test:data")) == [b"later"]
+
+    assert await jobs.cancel("later") is True
+    assert await jobs.cancel("later") is False
+    assert await jobs.pending() == 0
+    await jobs.stop()
+
+
+@pytest.mark.asyncio
+async def test_delayed_jobs_retries(memory_redis: database.MemoryRedis):
+    jobs = aio.DelayedJobs("test", memory_redis, poll_interval=0.01, retry_delay=0.01, max_attempts=3)
+    calls = []
+
+    @jobs.handler("flaky")
+    async def flaky(payload: dict) -> None:
+        calls.append(payload)
+        if len(calls) < 2:
+            raise ConnectionError
+
+    await jobs.schedule("flaky", {}, 0, job_id="flaky")
+    await jobs.schedule("unknown", {}, 0, job_id="unknown")  # no handler, given up after max_attempts
+    await jobs.start()
+    await _until(lambda: len(calls) == 2)
+    await _until(jobs.dead)
+    await _until(lambda: not jobs._running)
+    assert await jobs.pending() == 0
+    assert list(await jobs.dead()) == ["unknown"]
+    assert (await jobs.dead())["unknown"]["attempts"] == 3
+    await jobs.stop()
+
+
+@pytest.mark.asyncio
+async def test_delayed_jobs_recovery(memory_redis: database.MemoryRedis, monkeypatch: pytest.MonkeyPatch):
+    crashed = aio.DelayedJobs("test", memory_redis, visibility_timeout=0.1)
+    await crashed.schedule("job", {}, 0, job_id="job")
+    assert list((await crashed._claim())[1]) == ["job"]  # the process dies before running it
+
+    done = []
+    jobs = aio.DelayedJobs("test", memory_redis, poll_interval=0.01, visibility_timeout=0.1)
+
+    @jobs.handler("job")
+    async def job(payload: dict) -> None:
+        done.append(payload)
+
+    original, failures = memory_redis.zrangebyscore, [ConnectionError()]
+
+    async def zrangebyscore(*args: Any, **kwargs: Any) -> list:
+        if failures:
+            raise failures.pop()
+        return await original(*args, **kwargs)
+
+    monkeypatch.setattr(memory_redis, "zrangebyscore", zrangebyscore)  # the dispatcher survives redis errors
+    await jobs.start()
+    await asyncio.sleep(0.05)
+    assert done == []  # still leased by the crashed process
+    await _until(lambda: done == [{}])
+    await jobs.stop()
+
+
+@pytest.mark.asyncio
+async def test_delayed_jobs_rescheduled_while_claiming(
+    memory_redis: database.MemoryRedis, monkeypatch: pytest.MonkeyPatch
+):
+    jobs = aio.DelayedJobs("test", memory_redis)
+    await jobs.schedule("job", {"value": 1}, 0, job_id="job")
+
+    original, later = memory_redis.hmget, time.time() + 60
+
+    async def hmget(*args: Any, **kwargs: Any) -> list:
+        if await memory_redis.zscore("jobs:test", "job") != later:  # e.g. a sanction gets extended right now
+            await jobs.schedule("job", {"value": 2}, later, job_id="job")
+        return await original(*args, **kwargs)
+
+    monkeypatch.setattr(memory_redis, "hmget", hmget)
+    assert (await jobs._claim())[1] == {}
+    assert await memory_redis.zscore("jobs:test", "job") == later
+
+
+@pytest.mark.asyncio
+async def test_delayed_jobs_rescheduled_while_finishing(
+    memory_redis: database.MemoryRedis, monkeypatch: pytest.MonkeyPatch
+):
+    jobs = aio.DelayedJobs("test", memory_redis)
+    done = []
+
+    @jobs.handler("append")
+    async def append(payload: dict) -> None:
+        done.append(payload["value"])
+
+    await jobs.schedule("append", {"value": 1}, 0, job_id="job")
+    lease, claimed = await jobs._claim()
+
+    original, later = memory_redis.zscore, time.time() + 60
+
+    async def zscore(*args: Any, **kwargs: Any) -> Any:
+        score = await original(*args, **kwargs)
+        if score != later:  # scheduled again right after the lease has been checked
+            await jobs.schedule("append", {"value": 2}, later, job_id="job")
+        return score
+
+    monkeypatch.setattr(memory_redis, "zscore", zscore)
+    await jobs._attempt("job", lease, claimed["job"])
+    assert done == [1]
+    assert await original("jobs:test", "job") == later
+    assert await jobs.pending() == 1
+
+
+@pytest.mark.asyncio
+async def test_delayed_jobs_stop_all(memory_redis: database.MemoryRedis):
+    jobs = aio.DelayedJobs("test", memory_redis, poll_interval=0.01)
+    done = []
+
+    @jobs.handler("append")
+    async def append(payload: dict) -> None:
+        await asyncio.sleep(0.02)
+        done.append(payload["value"])
+
+    await jobs.schedule("append", {"value": 1}, 0)
+    await jobs.start()
+    assert jobs in aio.DelayedJobs.started
+    await _until(lambda: jobs._running)
+    await aio.DelayedJobs.stop_all()
+    assert jobs not in aio.DelayedJobs.started
+    assert done == [1]  # the running job finished before
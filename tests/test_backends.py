@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+
+from aioredis.exceptions import ResponseError
+from AlbertoX3 import database, settings
+from AlbertoX3.permission import PermissionModel
+
+__all__ = ()
+
+
+@pytest.mark.asyncio
+async def test_memory_redis_strings(memory_redis: database.MemoryRedis):
+    assert await memory_redis.get("missing") is None
+    assert await memory_redis.setex("key", 60, 42) is True
+    assert await memory_redis.get("key") == b"42"
+    assert await memory_redis.mget(["key", "missing"]) == [b"42", None]
+    assert await memory_redis.set("key", "other", nx=True) is None
+    assert await memory_redis.incr("counter") == 1
+    assert await memory_redis.delete("key", "counter", "missing") == 2
+    assert await memory_redis.exists("key") == 0
+
+
+@pytest.mark.asyncio
+async def test_memory_redis_expiry(memory_redis: database.MemoryRedis):
+    await memory_redis.set("key", "value", px=1)
+    await memory_redis.set("kept", "value")
+    assert await memory_redis.ttl("kept") == -1
+    await asyncio.sleep(0.01)
+    assert await memory_redis.get("key") is None
+    assert await memory_redis.keys("*") == [b"kept"]
+
+
+@pytest.mark.asyncio
+async def test_memory_redis_structures(memory_redis: database.MemoryRedis):
+    assert await memory_redis.hset("hash", mapping={"a": 1, "b": 2}) == 2
+    assert await memory_redis.hgetall("hash") == {b"a": b"1", b"b": b"2"}
+    assert await memory_redis.zadd("zset", {"late": 20, "early": 10}) == 2
+    assert await memory_redis.zrangebyscore("zset", "-inf", 15) == [b"early"]
+
+    with pytest.raises(ResponseError):
+        await memory_redis.get("hash")
+
+    pipe = memory_redis.pipeline()
+    pipe.hdel("hash", "a").zrem("zset", "early", "late")
+    assert await pipe.execute() == [1, 2]
+    assert await memory_redis.exists("zset") == 0
+
+
+@pytest.mark.asyncio
+@database.db_wrapper
+async def test_sqlite_db(sqlite_db: database.DB, memory_redis: database.MemoryRedis):
+    assert await PermissionModel.get("test.permission", 3) == 3
+    assert await memory_redis.get("permissions:test.permission") == b"3"
+
+    await PermissionModel.set("test.permission", 5)
+    await sqlite_db.commit()
+    await memory_redis.flushdb()
+    assert await PermissionModel.get("test.permission", 3) == 5
+
+    assert await settings.SettingsModel.get(int, "test.setting", 7) == 7
+    assert await sqlite_db.count(PermissionModel) == 1
@@ -0,0 +1,138 @@
+import asyncio
+import pytest
+
+from functools import partial
+from AlbertoX3 import aio, database
+from AlbertoX3.cache import CacheNamespace, CachePolicy, InvalidationBus
+
+__all__ = ()
+
+
+@pytest.mark.asyncio
+async def test_cache_namespace(memory_redis: database.MemoryRedis):
+    cache = CacheNamespace("test", memory_redis, ttl=60, local_size=2, local_ttl=60)
+    assert await cache.get("a") is None
+
+    await cache.set("a", 1)
+    assert await memory_redis.get("test:a") == b"1"
+    await memory_redis.set("test:a", "2")
+    assert await cache.get("a") == "1"  # served by the local cache
+
+    cache.invalidate_local("a")
+    assert await cache.get("a") == "2"  # decoded from redis
+
+    await cache.invalidate("a")
+    assert await cache.get("a") is None
+    assert (cache.stats.local_hits, cache.stats.redis_hits, cache.stats.misses) == (1, 1, 2)
+
+    typed = CacheNamespace("typed", memory_redis, CachePolicy(loads=int), ttl=60)
+    await typed.set("a", 3)
+    typed.clear_local()
+    assert await typed.get("a") == 3
+    assert CacheNamespace.namespaces["typed"] is typed  # unregistered after the test by cache_namespaces
+
+
+@pytest.mark.asyncio
+async def test_invalidation_bus(memory_redis: database.MemoryRedis):
+    # two processes sharing one redis
+    bus_a, bus_b = InvalidationBus(memory_redis), InvalidationBus(memory_redis)
+    cache_a = CacheNamespace("bus", memory_redis, ttl=60, local_ttl=60, bus=bus_a)
+    cache_b = CacheNamespace("bus", memory_redis, ttl=60, local_ttl=60, bus=bus_b)
+    bus_a.start()
+    bus_b.start()
+    await asyncio.sleep(0)
+
+    await cache_a.set("a", 1)
+    assert await cache_b.get("a") == "1"
+    await cache_a.set("a", 2)
+    await asyncio.sleep(0)
+    assert cache_a.local.get("a") == "2"  # own messages are ignored
+    assert await cache_b.get("a") == "2"
+
+    await cache_a.set("b", 3, publish=False)
+    await cache_b.get("b")
+    await cache_a.clear()
+    await asyncio.sleep(0)
+    assert cache_b.local.get("b") is None
+
+    await bus_a.stop()
+    await bus_b.stop()
+
+
+@pytest.mark.asyncio
+async def test_cache_get_or_load(memory_redis: database.MemoryRedis):
+    cache = CacheNamespace("load", memory_redis, ttl=100, negative_ttl=10, jitter=0.1, local_size=0)
+    calls = []
+
+    async def loader(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value
+
+    load_a = partial(cache.get_or_load, "a", partial(loader, 1))
+    assert await asyncio.gather(load_a(), load_a()) == ["1", "1"]
+    assert calls == [1]  # one shared load
+    assert 90 <= await memory_redis.ttl("load:a") <= 110
+
+    assert await cache.get_or_load("b", partial(loader, None)) is None
+    assert await cache.get_or_load("b", partial(loader, None)) is None  # negatively cached
+    assert await cache.get("b") is None
+    assert calls == [1, None]
+    assert 9 <= await memory_redis.ttl("load:b") <= 11
+
+    # about to expire, the next read refreshes it in the background
+    await memory_redis.expire("load:a", 1)
+    cache.policy = cache.policy._replace(refresh_beta=1e6)
+    assert await cache.get_or_load("a", partial(loader, 2)) == "1"
+    await asyncio.gather(*cache._refreshes)
+    assert await memory_redis.get("load:a") == b"2"
+
+
+@pytest.mark.asyncio
+async def test_cache_load_while_changing(memory_redis: database.MemoryRedis):
+    cache = CacheNamespace("changing", memory_redis, ttl=60, local_ttl=60)
+
+    async def load(key: str, other: str) -> int:
+        await cache.set(other, 2)  # changed while loading
+        return 1
+
+    assert await cache.get_or_load("a", partial(load, "a", "b")) == "1"
+    assert cache.local.get("a") == "1" and await memory_redis.get("changing:a") == b"1"  # another key changed
+    assert await cache.get_or_load("c", partial(load, "c", "c")) == "1"
+    assert cache.local.get("c") == "2" and await memory_redis.get("changing:c") == b"2"  # set while loading wins
+    assert not cache._reading and not cache._changed
+
+
+@pytest.mark.asyncio
+async def test_cache_flush(memory_redis: database.MemoryRedis):
+    cache = CacheNamespace("flush", memory_redis, ttl=60, local_ttl=60)
+    await cache.set_many({f"ext.{i}": i for i in range(25)} | {"other.a": 1})
+    await memory_redis.set("unrelated", 1)
+
+    assert await cache.flush("ext.", batch_size=10) == 25
+    assert await memory_redis.keys("flush:*") == [b"flush:other.a"]
+    assert await cache.get("ext.1") is None and cache.local.get("other.a") == "1"
+
+    assert await cache.flush() == 1
+    assert await memory_redis.keys("*") == [b"unrelated"]
+
+
+@pytest.mark.asyncio
+async def test_cache_breaker(memory_redis: database.MemoryRedis):
+    async def ping() -> bool:
+        return await memory_redis.ping()
+
+    breaker = aio.CircuitBreaker("redis", ping, threshold=1, recovery_interval=0.01)
+    cache = CacheNamespace("breaker", memory_redis, breaker=breaker, ttl=60, local_ttl=60)
+    await cache.set("a", 1)
+
+    breaker.trip()  # e.g. redis timed out
+    await cache.set("a", 2)  # only the local cache and later the database know it
+    assert await memory_redis.get("breaker:a") == b"1"
+    cache.clear_local()
+    assert await cache.get("a") is None
+    assert await cache.get_or_load("a", partial(asyncio.sleep, 0, 2)) == "2"  # straight from the loader
+
+    await asyncio.sleep(0.05)  # the probe closes the circuit and the outdated value gets removed
+    assert not breaker.is_open
+    assert await memory_redis.get("breaker:a") is None
@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+
+from AlbertoX3 import Config, LIB_PATH, database, load_translations
+
+# the extension reads its translations on import
+Config(LIB_PATH.parent.joinpath("config.alberto-x3.yml"))
+load_translations()
+
+from extensions.role_play.db import CaseFileModel, CaseFileParticipantModel, CaseFileStatsModel  # noqa: E402
+
+
+__all__ = ()
+
+
+def _case(judge: int, defendant: int, witness: int | None = None) -> dict:
+    return {
+        "author": judge,
+        "status": 0,
+        "judge": judge,
+        "lay_judge": None,
+        "complainant": judge,
+        "complainant_lawyer": None,
+        "defendant": defendant,
+        "defendant_lawyer": None,
+        "witness": witness,
+        "expert": None,
+        "accusation": "",
+    }
+
+
+async def _participants(db: database.DB) -> dict[int, int]:
+    return {p.participant: p.cases for p in await db.all(database.select(CaseFileParticipantModel))}
+
+
+@pytest.mark.asyncio
+@database.db_wrapper
+async def test_case_file_stats_track(sqlite_db: database.DB):
+    for defendant in (2, 3):
+        await CaseFileModel.create(**_case(1, defendant))
+    stats = await sqlite_db.first(database.select(CaseFileStatsModel))
+    assert (stats.case_files, stats.participants) == (2, 3)
+    assert await _participants(sqlite_db) == {1: 2, 2: 1, 3: 1}
+
+    case = await CaseFileModel.get_by_id(1)
+    await case.edit(defendant=4, witness=1)  # a participant with two roles counts once
+    stats = await sqlite_db.first(database.select(CaseFileStatsModel))
+    assert (stats.case_files, stats.participants, stats.last_edited) == (2, 3, case.last_edited)
+    assert await _participants(sqlite_db) == {1: 2, 3: 1, 4: 1}
+
+
+@pytest.mark.asyncio
+@database.db_wrapper
+async def test_case_file_stats_rebuild(sqlite_db: database.DB):
+    for defendant in (2, 3):
+        await sqlite_db.add(CaseFileModel.preview(**_case(1, defendant, witness=defendant)))
+    await sqlite_db.add(CaseFileParticipantModel(participant=5, cases=7))  # outdated
+
+    await asyncio.gather(CaseFileStatsModel.rebuild(), CaseFileStatsModel.rebuild())
+    stats = await CaseFileStatsModel.rebuild()
+    assert (stats.case_files, stats.participants) == (2, 3)
+    assert await _participants(sqlite_db) == {1: 2, 2: 1, 3: 1}
@@ -0,0 +1,74 @@
+import pytest
+
+from itertools import cycle
+from pathlib import Path
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.sql.expression import insert, update
+from AlbertoX3 import database
+from AlbertoX3.permission import PermissionModel
+
+__all__ = ()
+
+
+@pytest.mark.asyncio
+async def test_entity_cache(file_db: database.DB):
+    cache = file_db.entity_cache
+
+    async def level() -> tuple[int, int, int]:
+        hits, misses = cache.hits, cache.misses
+        file_db.create_session()
+        value = (await file_db.get(PermissionModel, permission="a")).level
+        await file_db.close()
+        return value, cache.hits - hits, cache.misses - misses
+
+    file_db.create_session()
+    await file_db.add(PermissionModel(permission="a", level=1), commit=True)
+    await file_db.close()
+    assert await level() == (1, 0, 1)
+    assert await level() == (1, 1, 0)
+
+    # changed through the ORM: the identity key gets invalidated
+    file_db.create_session()
+    (await file_db.get(PermissionModel, permission="a")).level = 2
+    await file_db.commit()
+    await file_db.close()
+    assert await level() == (2, 0, 1)
+    assert await level() == (2, 1, 0)
+
+    # changed by a DML statement: the whole table gets invalidated
+    file_db.create_session()
+    await file_db.exec(update(PermissionModel).values(level=3))
+    await file_db.commit()
+    await file_db.close()
+    assert await level() == (3, 0, 1)
+
+
+@pytest.mark.asyncio
+async def test_entity_cache_replica(file_db: database.DB, tmp_path: Path):
+    replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.sqlite'}")
+    async with replica.begin() as conn:
+        await conn.run_sync(database.Base.metadata.create_all)
+        await conn.execute(insert(PermissionModel).values(permission="a", level=1))  # lagging behind
+    file_db.replicas, file_db._replica_cycle = [replica], cycle([replica])
+
+    file_db.create_session()
+    await file_db.add(PermissionModel(permission="a", level=2), commit=True)
+    await file_db.close()
+
+    cache, misses = file_db.entity_cache, file_db.entity_cache.misses
+    for _ in range(2):
+        file_db.create_session()
+        assert (await file_db.get(PermissionModel, permission="a")).level == 1
+        await file_db.close()
+    assert cache.misses - misses == 2  # not cached from the replica
+
+    file_db.create_session()
+    file_db.session.info["pinned"] = True  # e.g. after a write
+    assert (await file_db.get(PermissionModel, permission="a")).level == 2
+    await file_db.close()
+    hits = cache.hits
+    file_db.create_session()
+    assert (await file_db.get(PermissionModel, permission="a")).level == 2
+    await file_db.close()
+    assert cache.hits - hits == 1
+    await replica.dispose()
@@ -0,0 +1,47 @@
+import pytest
+
+from pathlib import Path
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.sql.expression import text
+from AlbertoX3 import database
+
+__all__ = ()
+
+
+@pytest.mark.asyncio
+async def test_session_metrics(file_db: database.DB):
+    file_db.create_session()
+    await file_db.close()
+    file_db.create_session()
+    await file_db.session.execute(text("SELECT 1"))
+    await file_db.close()
+
+    assert file_db.metrics.counters["db.session.unused"] == 1
+    assert file_db.metrics.histograms["db.session.lifetime"].count == 2
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics(file_db: database.DB, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.sqlite'}", poolclass=database.TimedQueuePool, pool_pre_ping=True
+    )
+    file_db._instrument(engine, "pool")
+    metrics = file_db.metrics
+
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        assert metrics.gauges["db.pool.pool.checked_out"] == 1
+    assert metrics.gauges["db.pool.pool.checked_out"] == 0
+    assert metrics.histograms["db.pool.pool.checkout_wait"].count == 1
+    assert metrics.histograms["db.pool.statement"].count == 1
+
+    # the pooled connection went away, the pre-ping on the next checkout notices it
+    monkeypatch.setattr(engine.dialect, "do_ping", lambda _: False)
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        await conn.invalidate()
+    assert metrics.counters["db.pool.pool.pre_ping_failures"] == 1
+    assert metrics.counters["db.pool.pool.invalidations"] == 1
+    assert metrics.histograms["db.pool.statement"].count == 2
+
+    await engine.dispose()
@@ -0,0 +1,29 @@
+import pytest
+
+from AlbertoX3 import database, errors
+from AlbertoX3.permission import PermissionModel
+
+__all__ = ()
+
+
+@pytest.mark.asyncio
+@database.db_wrapper
+async def test_paginate(sqlite_db: database.DB):
+    await PermissionModel.seed({f"p{i}": i % 3 for i in range(5)})
+
+    pages = [page async for page in sqlite_db.paginate(database.select(PermissionModel), PermissionModel.permission, 2)]
+    assert [[p.permission for p in page.items] for page in pages] == [["p0", "p1"], ["p2", "p3"], ["p4"]]
+    assert pages[-1].cursor is None
+
+    # labelled columns, descending by two keys, resumed from a cursor
+    key = (PermissionModel.level, PermissionModel.permission)
+    query = database.select(PermissionModel.permission.label("name")).add_columns(PermissionModel.level.label("value"))
+    first = await sqlite_db.paginate(query, key, 2, descending=True).__anext__()
+    assert [tuple(row) for row in first.items] == [("p2", 2), ("p4", 1)]
+    rest = [row.name async for page in sqlite_db.paginate(query, key, 2, first.cursor, True) for row in page.items]
+    assert rest == ["p1", "p3", "p0"]
+
+    with pytest.raises(ValueError):
+        await sqlite_db.paginate(database.select(PermissionModel.level), PermissionModel.permission).__anext__()
+    with pytest.raises(errors.InvalidCursorError):
+        await sqlite_db.paginate(query, key, cursor="invalid").__anext__()
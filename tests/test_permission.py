@@ -0,0 +1,41 @@
+import pytest
+
+from naff.models.discord.enums import Permissions
+from types import SimpleNamespace
+from AlbertoX3 import database, settings
+from AlbertoX3.permission import MemberLevelCache, PermissionLevel, PermissionModel
+
+__all__ = ()
+
+
+@pytest.mark.asyncio
+@database.db_wrapper
+async def test_permission_get_many(sqlite_db: database.DB, memory_redis: database.MemoryRedis):
+    await PermissionModel.set("cached", 4)
+    await PermissionModel.seed({"stored": 2})
+
+    assert await PermissionModel.get_many({"cached": 0, "stored": 0, "new": 1}) == {"cached": 4, "stored": 2, "new": 1}
+    assert await memory_redis.mget(["permissions:stored", "permissions:new"]) == [b"2", b"1"]
+    assert await sqlite_db.count(PermissionModel) == 3
+
+
+@pytest.mark.asyncio
+@database.db_wrapper
+async def test_member_level_cache(sqlite_db: database.DB, memory_redis: database.MemoryRedis):
+    def member(*roles: int, permissions: Permissions = Permissions.NONE) -> SimpleNamespace:
+        return SimpleNamespace(
+            roles=[SimpleNamespace(id=r) for r in roles], guild=SimpleNamespace(id=1), guild_permissions=permissions
+        )
+
+    settings.settings_cache.clear_local()
+    levels = MemberLevelCache(
+        [PermissionLevel(2, [], "Admin", ["administrator"], ["admin"]), PermissionLevel(1, [], "Team", [], ["team"])]
+    )
+    await settings.RoleSettings.set("team", 10)
+    assert await levels.resolve(member(10)) == 1
+    assert await levels.resolve(member(10, 11)) == 1
+    assert await levels.resolve(member(11, permissions=Permissions.ADMINISTRATOR)) == 2
+    assert await levels.resolve(member(11, permissions=Permissions.KICK_MEMBERS)) == 0
+
+    await settings.RoleSettings.set("admin", 11)  # drops the cached levels
+    assert await levels.resolve(member(10, 11)) == 2
@@ -0,0 +1,64 @@
+import pytest
+
+from functools import partial
+from pathlib import Path
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.sql.expression import insert, update
+from AlbertoX3 import database, routing
+from AlbertoX3.permission import PermissionModel
+
+__all__ = ()
+
+
+@pytest.mark.asyncio
+async def test_lazy_session(file_db: database.DB):
+    lazy = file_db.create_session()
+    await file_db.close()
+    assert lazy.closed and not lazy.materialized
+
+    lazy = file_db.create_session()
+    assert await file_db.get(PermissionModel, permission="a") is None
+    assert lazy.materialized and not lazy.has_writes
+
+    await file_db.add(PermissionModel(permission="a", level=1))
+    assert lazy.has_writes
+    await file_db.commit()
+    assert not lazy.has_writes
+    await file_db.close()
+
+    file_db.create_session()
+    assert (await file_db.get(PermissionModel, permission="a")).level == 1
+    await file_db.close()
+
+
+@pytest.mark.asyncio
+async def test_routing_session(tmp_path: Path):
+    primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.sqlite'}")
+    replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.sqlite'}")
+    for engine, level in ((primary, 1), (replica, 2)):
+        async with engine.begin() as conn:
+            await conn.run_sync(partial(database.Base.metadata.create_all, tables=[PermissionModel.__table__]))
+            await conn.execute(insert(PermissionModel).values(permission="a", level=level))
+
+    def session() -> AsyncSession:
+        return AsyncSession(primary, info={"replica": replica.sync_engine}, sync_session_class=routing.RoutingSession)
+
+    query = database.select(PermissionModel.level)
+    async with session() as s:
+        assert await s.scalar(query) == 2
+        assert await s.scalar(query) == 2
+        assert await s.scalar(query.execution_options(primary=True)) == 1
+        assert s.info["pinned"] and await s.scalar(query) == 1
+
+    async with session() as s:
+        assert await s.scalar(query.with_for_update()) == 1
+        assert s.info["pinned"]
+
+    # reads its own writes
+    async with session() as s:
+        await s.execute(update(PermissionModel).values(level=3))
+        assert s.info["pinned"] and await s.scalar(query) == 3
+        await s.rollback()
+
+    await primary.dispose()
+    await replica.dispose()
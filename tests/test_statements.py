@@ -0,0 +1,57 @@
+import pytest
+
+from functools import partial
+from pathlib import Path
+from sqlalchemy.ext.asyncio import create_async_engine
+from AlbertoX3 import database, statements
+from AlbertoX3.permission import PermissionModel
+
+__all__ = ()
+
+
+@pytest.mark.asyncio
+async def test_statement_recorder(tmp_path: Path):
+    assert statements._fingerprint("SELECT * FROM t WHERE a = 'x' AND b IN (1, 2) LIMIT :n") == (
+        "SELECT * FROM t WHERE a = ? AND b IN (?+) LIMIT ?"
+    )
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'recorder.sqlite'}")
+    recorder = statements.StatementRecorder()
+    recorder.attach(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(partial(database.Base.metadata.create_all, tables=[PermissionModel.__table__]))
+        recorder.clear()
+        for level in (1, 2):
+            await conn.execute(
+                database.select(PermissionModel)
+                .where(PermissionModel.level == level)
+                .order_by(PermissionModel.permission)
+            )
+        # the primary key already covers this one
+        await conn.execute(database.select(PermissionModel).where(PermissionModel.permission == "a"))
+    await engine.dispose()
+
+    assert sorted(stats.count for stats in recorder.statements.values()) == [1, 2]
+    (suggestion,) = recorder.suggest_indexes(engine.dialect)
+    assert (suggestion.table, suggestion.columns, suggestion.statements) == ("permissions", ("level", "permission"), 2)
+    assert suggestion.ddl == "CREATE INDEX ix_permissions_level_permission ON permissions (level, permission)"
+
+
+@pytest.mark.asyncio
+async def test_bound_filter_by(file_db: database.DB):
+    file_db.create_session()
+    await file_db.add(PermissionModel(permission="a", level=1))
+    await file_db.add(PermissionModel(permission="b", level=2))
+
+    statement, params = database.bound_filter_by(PermissionModel, permission="a")
+    other, other_params = database.bound_filter_by(PermissionModel, permission="b")
+    assert statement is other
+    assert (params, other_params) == ({"filter_by_permission": "a"}, {"filter_by_permission": "b"})
+    assert (await file_db.first(statement, params)).level == 1
+    assert (await file_db.first(other, other_params)).level == 2
+
+    # None isn't a parameter but part of the shape
+    null, params = database.bound_filter_by(PermissionModel, permission=None)
+    assert null is not statement and params == {} and "IS NULL" in str(null)
+    assert await file_db.first(null) is None
+    await file_db.close()
@@ -0,0 +1,43 @@
+import pytest
+
+from AlbertoX3 import database
+from AlbertoX3.permission import PermissionModel
+
+__all__ = ()
+
+
+@pytest.mark.asyncio
+@database.db_wrapper
+async def test_upsert(sqlite_db: database.DB):
+    await PermissionModel.seed({"a": 1, "b": 2})
+    await PermissionModel.seed({"a": 3, "c": 3})
+    assert [(p.permission, p.level) for p in await sqlite_db.all(database.select(PermissionModel))] == [
+        ("a", 1),
+        ("b", 2),
+        ("c", 3),
+    ]
+
+    await PermissionModel.set("a", 4)
+    assert (await sqlite_db.get(PermissionModel, permission="a")).level == 4
+
+    await sqlite_db.upsert_many(PermissionModel, [{"permission": "b", "level": 5}, {"permission": "d", "level": 6}])
+    assert await sqlite_db.count(PermissionModel) == 4
+    assert (await sqlite_db.get(PermissionModel, permission="b")).level == 5
+
+
+@pytest.mark.asyncio
+async def test_upsert_keeps_pending_changes(sqlite_db: database.DB):
+    async with database.db_context():
+        await PermissionModel.seed({"a": 1})
+
+    async with database.db_context():
+        (await sqlite_db.get(PermissionModel, permission="a")).level = 9
+        await PermissionModel.seed({"b": 1})
+
+    async with database.db_context():
+        assert (await sqlite_db.get(PermissionModel, permission="a")).level == 9
+
+        # only the upserted rows are loaded again
+        other = await sqlite_db.get(PermissionModel, permission="b")
+        await sqlite_db.upsert(PermissionModel, {"permission": "b", "level": 2})
+        assert (await sqlite_db.get(PermissionModel, permission="b")) is other and other.level == 2
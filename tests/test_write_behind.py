@@ -0,0 +1,43 @@
+import pytest
+
+from pathlib import Path
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.sql.schema import Column, MetaData, Table
+from sqlalchemy.sql.sqltypes import Integer
+from AlbertoX3 import database, write_behind
+
+__all__ = ()
+
+
+@pytest.mark.asyncio
+@database.db_wrapper
+async def test_write_behind_buffer(sqlite_db: database.DB, tmp_path: Path):
+    table = Table("buffered", MetaData(), Column("id", Integer, primary_key=True))
+    async with sqlite_db.engine.begin() as conn:
+        await conn.run_sync(table.create)
+
+    buffer = write_behind.WriteBehindBuffer(sqlite_db.engine, interval=60, max_queue=3)
+    for i in (1, 2, 3):
+        await buffer.put(table, {"id": i})
+    assert await buffer.flush() == 3
+
+    # the duplicate gets dropped, the other rows of the batch are written
+    await buffer.put(table, {"id": 3})
+    await buffer.put(table, {"id": 4})
+    assert await buffer.flush() == 1
+    assert (buffer.rows_buffered, buffer.rows_flushed, buffer.rows_failed) == (5, 4, 1)
+
+    # the database can't be reached: the rows are kept up to max_queue and retried
+    buffer.engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/db.sqlite")
+    for i in (5, 6, 7, 8):
+        buffer._pending.append((table, {"id": i}))
+    with pytest.raises(OperationalError):
+        await buffer.flush()
+    assert buffer.size == 3 and buffer.rows_failed == 2
+
+    await buffer.engine.dispose()
+    buffer.engine = sqlite_db.engine
+    assert await buffer.flush() == 3
+    assert await sqlite_db.all(database.select(table.c.id)) == [1, 2, 3, 4, 5, 6, 7]
+    await buffer.close()